@@ -16,12 +16,29 @@ Checks the following...
   genotypes
   allele lists
 
+- multiple allele codes are first expanded using a local code table,
+  e.g. NMDP alpha.v3.txt (-m/--macs)
+
+- optionally, if any allele is not found in a local nomenclature file,
+  e.g. IMGT/HLA Allelelist.txt (-n/--nomenclature)
+
+- with -s/--summary, only a summary of the violations found (including
+  alleles not in the nomenclature, with -n) is printed, instead of every
+  item checked (see glstring.report)
+
 Note: Both genotypes and genotype lists may contain phased loci,
-      and so these may contain multiple loci
+      and so these may contain multiple loci. Their haplotypes are
+      checked to have the same locus at each phased position
+      (see glstring.check.haplotype_loci)
 """
 
 import argparse
+import sys
+
 import glstring.check as check
+from glstring.mac import load_macs
+from glstring.nomenclature import load_nomenclature
+from glstring.report import Summary
 
 
 def main():
@@ -30,13 +47,36 @@ def main():
                         required=True,
                         help="GL String to be checked",
                         type=str)
+    parser.add_argument("-n", "--nomenclature",
+                        help="allele list file to check allele names against",
+                        type=str)
+    parser.add_argument("-m", "--macs",
+                        help="multiple allele code table to expand codes with",
+                        type=str)
+    parser.add_argument("-s", "--summary",
+                        help="only print a summary of the violations found",
+                        action="store_true")
     args = parser.parse_args()
 
     if args.glstring:
         gl = args.glstring
+    if args.macs:
+        gl = load_macs(args.macs).expand(gl)
 
     # print("\n", "GL String =", gl, "\n")
 
+    if args.summary:
+        violations = check.get_violations(check.check_all(gl))
+        if args.nomenclature:
+            nomenclature = load_nomenclature(args.nomenclature)
+            for allele, loci, msg in check.alleles(gl, nomenclature):
+                if 'WARNING' in msg:
+                    violations.append(('alleles', loci, allele))
+        summary = Summary()
+        summary.add(gl, violations)
+        summary.write(sys.stdout)
+        return
+
     print("\nChecking locus blocks...")
     locusblocks, duplicates = check.locus_blocks(gl)
     for locusblock in locusblocks:
@@ -58,6 +98,9 @@ def main():
     check.printchecked(check.genotype_lists(gl), 'genotype lists')
     check.printchecked(check.genotypes(gl), 'genotypes')
     check.printchecked(check.allele_lists(gl), 'allele lists')
+    if args.nomenclature:
+        nomenclature = load_nomenclature(args.nomenclature)
+        check.printchecked(check.alleles(gl, nomenclature), 'alleles')
 
 
 if __name__ == '__main__':
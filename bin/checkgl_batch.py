@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+checkgl_batch.py
+
+This script does the sanity checks of checkgl.py on a file of GL Strings,
+one record per line, either 'id<TAB>GL String' or just 'GL String'.
+
+A result line is written for each record (see glstring.batch), and a
+summary of the counts is printed to stderr at the end. Records that are
+too long, have too many alleles or imply too many genotypes, or whose
+check takes too long, are written to the quarantine file instead.
+
+With --shard i/N, only shard i (counting from 0) of N of the input is
+checked, chosen either by a hash of the record ids, or by byte range of the
+input file. The result and stats files of the shards are combined with
+checkgl_merge.py.
+
+With --checkpoint, the progress of the run is saved every
+--checkpoint-every records, and a run that was stopped can be continued
+from its last checkpoint with --resume, without checking or writing any
+record twice.
+
+With --workers, reading, checking (in that many processes) and writing
+run as separate stages (see glstring.pipeline), and the throughput and
+queue depth of each stage are printed to stderr at the end.
+
+With --sample N, only a uniform sample of N records (or N per number of
+locus blocks, with --stratify) is checked, and estimated violation rates
+for the whole input, by check and by locus, are written to the output
+instead of results (see glstring.sampling).
+
+With --summary, the counts of violations by check, locus and locus pair,
+and the alleles most often involved, each with an example record id, are
+written to a summary report (see glstring.report) at the end, and every
+--summary-every records if given. Without --output, only the summary is
+written, not a result line per record.
+
+With --memory-profile, the run is profiled with tracemalloc (see
+glstring.memory), and the peak and current memory of each stage, the
+allocation sites holding the most memory, and the records whose checks
+needed the most memory are written to that file as JSON. This slows the
+run down several times, and only works without --workers.
+
+With --progress, progress is reported to stderr every that many seconds:
+records and bytes done, rate, time left, how busy the checkers are, and
+violations so far (see glstring.progress), and with --progress-file, the
+same is written there as JSON.
+
+example usage:
+checkgl_batch.py -i records.txt -o results.txt -q quarantine.txt \\
+    --max-genotypes 100000 --time-budget 5
+
+# on each of 4 nodes, i = 0..3
+checkgl_batch.py -i records.txt --shard i/4 --shard-by range \\
+    -o results.i.txt -s stats.i.json
+
+# only report what was found, and how often
+checkgl_batch.py -i records.txt --summary summary.txt --summary-every 100000
+
+# estimate how dirty a new feed is from 10000 records
+checkgl_batch.py -i feed.txt --sample 10000 --stratify
+
+# find out where the memory goes, snapshot every 50000 records
+checkgl_batch.py -i records.txt -o results.txt \\
+    --memory-profile memory.json --memory-every 50000
+
+# keep an eye on a long run
+checkgl_batch.py -i records.txt -o results.txt -w 8 --progress 30 \\
+    --progress-file progress.json
+
+# continue a run that was stopped
+checkgl_batch.py -i records.txt -o results.txt --checkpoint run.ckpt --resume
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import glstring.batch as batch
+import glstring.memory as memory
+import glstring.pipeline as pipeline
+import glstring.progress as progress
+import glstring.sampling as sampling
+from glstring.guards import guarded
+from glstring.report import Summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--input",
+                        help="file of GL String records (default: stdin)",
+                        type=str)
+    parser.add_argument("-o", "--output",
+                        help="file to write results to (default: stdout)",
+                        type=str)
+    parser.add_argument("-q", "--quarantine",
+                        help="file to write quarantined records to",
+                        type=str)
+    parser.add_argument("--max-length",
+                        help="quarantine GL Strings longer than this",
+                        type=int)
+    parser.add_argument("--max-tokens",
+                        help="quarantine GL Strings with more alleles",
+                        type=int)
+    parser.add_argument("--max-genotypes",
+                        help="quarantine GL Strings implying more genotypes",
+                        type=int)
+    parser.add_argument("--time-budget",
+                        help="quarantine GL Strings taking longer to check "
+                             "(seconds)",
+                        type=float)
+    parser.add_argument("-s", "--stats",
+                        help="file to write the summary counts to as JSON",
+                        type=str)
+    parser.add_argument("--shard",
+                        help="only check shard I (from 0) of N, as I/N",
+                        type=str)
+    parser.add_argument("--shard-by",
+                        help="assign records to shards by id hash (default) "
+                             "or input byte range",
+                        choices=["hash", "range"],
+                        default="hash")
+    parser.add_argument("--checkpoint",
+                        help="file to save checkpoints of the run to",
+                        type=str)
+    parser.add_argument("--checkpoint-every",
+                        help="records between checkpoints (default: 10000)",
+                        type=int,
+                        default=10000)
+    parser.add_argument("--resume",
+                        help="continue from the last checkpoint",
+                        action="store_true")
+    parser.add_argument("-w", "--workers",
+                        help="check in this many worker processes",
+                        type=int)
+    parser.add_argument("--batch-size",
+                        help="records per batch sent to a worker "
+                             "(default: 1000)",
+                        type=int,
+                        default=1000)
+    parser.add_argument("--sample",
+                        help="only check a sample of this many records, and "
+                             "write estimated violation rates",
+                        type=int)
+    parser.add_argument("--stratify",
+                        help="sample separately by number of locus blocks",
+                        action="store_true")
+    parser.add_argument("--seed",
+                        help="random seed for --sample",
+                        type=int)
+    parser.add_argument("--summary",
+                        help="file to write a summary report to "
+                             "('-' for stdout)",
+                        type=str)
+    parser.add_argument("--summary-every",
+                        help="also write the summary report every this many "
+                             "records",
+                        type=int)
+    parser.add_argument("--memory-profile",
+                        help="file to write a tracemalloc memory profile of "
+                             "the run to as JSON",
+                        type=str)
+    parser.add_argument("--memory-every",
+                        help="records between memory snapshots "
+                             "(default: 10000)",
+                        type=int,
+                        default=10000)
+    parser.add_argument("--progress",
+                        help="report progress to stderr every this many "
+                             "seconds",
+                        type=float)
+    parser.add_argument("--progress-file",
+                        help="file to write progress to as JSON",
+                        type=str)
+    args = parser.parse_args()
+
+    if args.checkpoint and not (args.output or args.summary):
+        parser.error("--checkpoint needs an --output or --summary file")
+    if args.memory_profile and args.workers:
+        parser.error("--memory-profile only works without --workers")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs a --checkpoint file")
+    checkpoint = None
+    if args.resume and os.path.exists(args.checkpoint):
+        checkpoint = batch.read_checkpoint(args.checkpoint)
+
+    infile = open(args.input, 'rb') if args.input else sys.stdin.buffer
+    if args.summary == '-':
+        summary_file = sys.stdout
+    elif args.summary:
+        summary_file = open(args.summary, 'w')
+    else:
+        summary_file = None
+    if checkpoint is None:
+        if args.output:
+            outfile = open(args.output, 'w')
+        else:
+            outfile = None if args.summary else sys.stdout
+        quarantine = open(args.quarantine, 'w') if args.quarantine else None
+        stats = None
+        summary = Summary() if args.summary else None
+        resume_at = 0
+        resume_line = None
+    else:
+        if not args.input:
+            parser.error("--resume needs an --input file")
+        outfile = None
+        if args.output:
+            outfile = open(args.output, 'r+')
+            outfile.truncate(checkpoint['output_offset'])
+            outfile.seek(0, os.SEEK_END)
+        quarantine = None
+        if args.quarantine:
+            quarantine = open(args.quarantine, 'r+')
+            quarantine.truncate(checkpoint['quarantine_offset'] or 0)
+            quarantine.seek(0, os.SEEK_END)
+        stats = checkpoint['stats']
+        summary = None
+        if args.summary and checkpoint.get('summary'):
+            summary = Summary.from_dict(checkpoint['summary'])
+        elif args.summary:
+            summary = Summary()
+        resume_at = checkpoint['input_offset']
+        resume_line = checkpoint['line'] + 1
+
+    if args.shard:
+        try:
+            shard, shards = (int(n) for n in args.shard.split('/'))
+        except ValueError:
+            shard = shards = 0
+        if not 0 <= shard < shards:
+            parser.error("--shard must be I/N with 0 <= I < N")
+    if args.shard and args.shard_by == 'range':
+        if not args.input:
+            parser.error("--shard-by range needs an --input file")
+        start, end = batch.shard_range(infile, shard, shards)
+        if resume_at > start:
+            records = batch.read_records(infile, resume_at, end,
+                                         resume_line)
+        else:
+            records = batch.read_records(infile, start, end)
+    else:
+        records = batch.read_records(infile, resume_at, number=resume_line)
+        if args.shard:
+            records = batch.shard_by_hash(records, shard, shards)
+
+    if summary is not None:
+        summary.out = summary_file
+        summary.every = args.summary_every
+
+    if args.sample:
+        key = sampling.locus_blocks_stratum if args.stratify else None
+        samples, population = sampling.reservoir_sample(
+            records, args.sample, key, args.seed)
+        checker = guarded(batch.check_violations, args.max_length,
+                          args.max_tokens, args.max_genotypes,
+                          args.time_budget)
+        estimates = sampling.estimate(samples, population, checker)
+        sampling.write_estimates(estimates, population, samples,
+                                 outfile or summary_file)
+        for f in (outfile, summary_file):
+            if f not in (None, sys.stdout):
+                f.close()
+        return
+
+    run_progress = None
+    if args.progress or args.progress_file:
+        if args.shard and args.shard_by == 'range':
+            total_bytes, start_offset = end, max(start, resume_at)
+        elif args.input:
+            total_bytes, start_offset = os.path.getsize(args.input), resume_at
+        else:
+            total_bytes, start_offset = None, resume_at
+        run_progress = progress.Progress(
+            total_bytes, start_offset, every=args.progress or 10.0,
+            out=sys.stderr if args.progress else None,
+            path=args.progress_file)
+
+    options = dict(max_length=args.max_length,
+                   max_tokens=args.max_tokens,
+                   max_genotypes=args.max_genotypes,
+                   seconds=args.time_budget,
+                   checkpoint=args.checkpoint,
+                   checkpoint_every=args.checkpoint_every,
+                   summary=summary,
+                   progress=run_progress)
+    stages = {}
+    if args.workers:
+        stats = pipeline.run(records, outfile, quarantine, stats,
+                             workers=args.workers,
+                             batch_size=args.batch_size,
+                             stages=stages, **options)
+    elif args.memory_profile:
+        profiler = memory.MemoryProfiler(args.memory_every)
+        profiler.start()
+        try:
+            stats = batch.run(records, outfile, quarantine, stats,
+                              profiler=profiler, **options)
+        finally:
+            profiler.stop()
+            profiler.write(args.memory_profile)
+    else:
+        stats = batch.run(records, outfile, quarantine, stats, **options)
+
+    if summary is not None:
+        summary.write(summary_file)
+        stats['summary'] = summary.to_dict()
+    for f in (infile, outfile, quarantine, summary_file):
+        if f not in (None, sys.stdin.buffer, sys.stdout):
+            f.close()
+    if args.stats:
+        with open(args.stats, 'w') as f:
+            json.dump(stats, f, indent=2)
+    print(', '.join('{}: {}'.format(key, value)
+                    for key, value in stats.items() if key != 'summary'),
+          file=sys.stderr)
+    for name, report in stages.items():
+        print(name + ':', ', '.join('{}: {}'.format(key, value)
+                                    for key, value in report.items()),
+              file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+checkgl_db.py
+
+This script does the sanity checks of checkgl.py on the GL Strings in a
+SQLite table, and writes the results back to the gl_digest, gl_status and
+gl_violations columns of the same table (see glstring.db). Rows whose GL
+String has not changed since the last run are not checked again.
+
+example usage:
+checkgl_db.py -d registry.db -t typings --id-column donor_id \\
+    --glstring-column gl
+"""
+
+import argparse
+import sqlite3
+import sys
+
+import glstring.db as db
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--database",
+                        required=True,
+                        help="SQLite database file",
+                        type=str)
+    parser.add_argument("-t", "--table",
+                        required=True,
+                        help="table of GL Strings",
+                        type=str)
+    parser.add_argument("--id-column",
+                        help="unique id column (default: id)",
+                        type=str,
+                        default="id")
+    parser.add_argument("--glstring-column",
+                        help="GL String column (default: glstring)",
+                        type=str,
+                        default="glstring")
+    parser.add_argument("--page-size",
+                        help="rows read at a time (default: 10000)",
+                        type=int,
+                        default=10000)
+    parser.add_argument("--force",
+                        help="check every row, even if unchanged",
+                        action="store_true")
+    parser.add_argument("--max-genotypes",
+                        help="quarantine GL Strings implying more genotypes",
+                        type=int)
+    parser.add_argument("--time-budget",
+                        help="quarantine GL Strings taking longer to check "
+                             "(seconds)",
+                        type=float)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    stats = db.check_table(conn, args.table, args.id_column,
+                           args.glstring_column,
+                           page_size=args.page_size,
+                           force=args.force,
+                           max_genotypes=args.max_genotypes,
+                           seconds=args.time_budget)
+    conn.close()
+    print(', '.join('{}: {}'.format(key, value)
+                    for key, value in stats.items()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
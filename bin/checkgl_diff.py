@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+checkgl_diff.py
+
+This script compares the result files of two checkgl_batch.py runs of
+the same input, e.g. before and after a change of rules or data, matching
+records by id and line number, and writes only the records whose
+violations are new, fixed or changed, or that are in the results of only
+one run, e.g. because they were quarantined (see glstring.diff).
+Counts of those records, and of the violations added and removed by check
+and by locus, are printed to stderr as JSON.
+
+example usage:
+checkgl_diff.py old_results.txt new_results.txt -o changes.txt
+"""
+
+import argparse
+import json
+import sys
+
+import glstring.diff as diff
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old",
+                        help="result file of the old run",
+                        type=str)
+    parser.add_argument("new",
+                        help="result file of the new run",
+                        type=str)
+    parser.add_argument("-o", "--output",
+                        help="file to write changes to (default: stdout)",
+                        type=str)
+    parser.add_argument("--chunk-lines",
+                        help="lines sorted in memory at a time "
+                             "(default: 1000000)",
+                        type=int,
+                        default=1000000)
+    parser.add_argument("--tmpdir",
+                        help="directory for temporary sort files",
+                        type=str)
+    args = parser.parse_args()
+
+    outfile = open(args.output, 'w') if args.output else sys.stdout
+    with open(args.old) as old, open(args.new) as new:
+        counts = diff.diff_results(old, new, outfile, args.chunk_lines,
+                                   args.tmpdir)
+    if outfile is not sys.stdout:
+        outfile.close()
+    json.dump(counts, sys.stderr, indent=2)
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
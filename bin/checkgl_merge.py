@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+checkgl_merge.py
+
+This script combines the result files written by the shards of a
+checkgl_batch.py --shard run into one result file in input order, and
+their stats files into one combined summary. If the shards were run with
+--summary, the combined summary report is written with --summary.
+
+example usage:
+checkgl_merge.py -o results.txt results.0.txt results.1.txt \\
+    --stats stats.0.json stats.1.json --stats-output stats.json
+"""
+
+import argparse
+import json
+import sys
+from contextlib import ExitStack
+
+import glstring.batch as batch
+from glstring.report import Summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("results",
+                        help="result files of the shards",
+                        nargs="*")
+    parser.add_argument("-o", "--output",
+                        help="file to write merged results to "
+                             "(default: stdout)",
+                        type=str)
+    parser.add_argument("--stats",
+                        help="stats files of the shards",
+                        nargs="*",
+                        default=[])
+    parser.add_argument("--stats-output",
+                        help="file to write combined stats to "
+                             "(default: stderr)",
+                        type=str)
+    parser.add_argument("--summary",
+                        help="file to write the combined summary report of "
+                             "the shards to",
+                        type=str)
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(path)) for path in args.results]
+        if args.output:
+            outfile = stack.enter_context(open(args.output, 'w'))
+        else:
+            outfile = sys.stdout
+        batch.merge_results(files, outfile)
+
+    stats_list = []
+    for path in args.stats:
+        with open(path) as f:
+            stats_list.append(json.load(f))
+    if stats_list:
+        stats = batch.merge_stats(stats_list)
+        if args.summary and 'summary' in stats:
+            with open(args.summary, 'w') as f:
+                Summary.from_dict(stats['summary']).write(f)
+        if args.stats_output:
+            with open(args.stats_output, 'w') as f:
+                json.dump(stats, f, indent=2)
+        else:
+            json.dump(stats, sys.stderr, indent=2)
+            print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
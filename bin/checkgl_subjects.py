@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+checkgl_subjects.py
+
+This script checks that the GL Strings of the same subject agree with each
+other, in a file of records of 'subject id<TAB>GL String', one per line,
+where a subject can have any number of records (e.g. from different labs
+or typing rounds). For each locus typed in two or more records of a
+subject, every pair of them must have an allele in common (see
+glstring.consistency).
+
+A line is written for each conflict, and counts of subjects and of
+conflicts by locus are printed to stderr at the end. With --sorted, the
+input must be sorted by subject id (e.g. with LC_ALL=C sort), and is
+checked in one pass; otherwise records are grouped by subject in memory,
+spilling to disk when there are more than --max-records of them.
+
+example usage:
+checkgl_subjects.py -i typings.txt -o conflicts.txt
+
+LC_ALL=C sort typings.txt | checkgl_subjects.py --sorted -o conflicts.txt
+"""
+
+import argparse
+import json
+import sys
+
+import glstring.batch as batch
+import glstring.consistency as consistency
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-i", "--input",
+                        help="file of subject GL String records "
+                             "(default: stdin)",
+                        type=str)
+    parser.add_argument("-o", "--output",
+                        help="file to write conflicts to (default: stdout)",
+                        type=str)
+    parser.add_argument("--sorted",
+                        help="the input is sorted by subject id",
+                        action="store_true")
+    parser.add_argument("--max-records",
+                        help="records to group in memory before spilling to "
+                             "disk (default: 1000000)",
+                        type=int,
+                        default=1000000)
+    parser.add_argument("--tmpdir",
+                        help="directory for spilled records",
+                        type=str)
+    args = parser.parse_args()
+
+    infile = open(args.input, 'rb') if args.input else sys.stdin.buffer
+    outfile = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        stats = consistency.check_subjects(batch.read_records(infile),
+                                           outfile,
+                                           presorted=args.sorted,
+                                           max_records=args.max_records,
+                                           tmpdir=args.tmpdir)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        for f in (infile, outfile):
+            if f not in (sys.stdin.buffer, sys.stdout):
+                f.close()
+    json.dump(stats, sys.stderr, indent=2)
+    print(file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
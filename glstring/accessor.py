@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+accessor.py
+
+pandas accessor for Series of GL Strings. Importing this module imports
+pandas and registers the accessor, e.g.
+
+    import glstring.accessor
+    df['gl'].glstring.check()
+    df['gl'].glstring.loci()
+
+Nothing else in the glstring package imports pandas. Each distinct GL
+String in a Series is checked once, and the results are spread back over
+the Series; missing values give missing results.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .glstring import get_alleles
+from .glstring import get_loci
+from .vectorized import check_batch
+
+
+@pd.api.extensions.register_series_accessor('glstring')
+class GlStringAccessor:
+    """
+    .glstring accessor for a Series of GL Strings
+    """
+
+    def __init__(self, series):
+        self._series = series
+
+    def _distinct(self):
+        """
+        returns the code of each value in the Series, and the distinct
+        values (missing values have code -1)
+        """
+        codes, distinct = pd.factorize(self._series)
+        return codes, np.asarray(distinct, dtype=object)
+
+    def check(self):
+        """
+        Returns a DataFrame aligned with the Series, with a nullable boolean
+        column for each check in glstring.vectorized.check_batch (True if
+        it gave a WARNING), and an 'ok' column that is True if none did
+        """
+        codes, distinct = self._distinct()
+        missing = codes < 0
+        columns = {}
+        for level, flags in check_batch(distinct).items():
+            flags = np.append(flags, False)[codes]
+            columns[level] = pd.array(np.where(missing, None, flags),
+                                      dtype='boolean')
+        checked = pd.DataFrame(columns, index=self._series.index)
+        checked['ok'] = ~checked[list(columns)].any(axis=1)
+        checked.loc[missing, 'ok'] = pd.NA
+        return checked
+
+    def _map_distinct(self, function):
+        codes, distinct = self._distinct()
+        results = np.empty(len(distinct) + 1, dtype=object)
+        results[:-1] = [frozenset(function(glstr)) for glstr in distinct]
+        results[-1] = None
+        return pd.Series(results[codes], index=self._series.index,
+                         name=self._series.name)
+
+    def loci(self):
+        """
+        Returns a Series of frozensets of the loci in each GL String
+        """
+        return self._map_distinct(get_loci)
+
+    def alleles(self):
+        """
+        Returns a Series of frozensets of the alleles in each GL String
+        """
+        return self._map_distinct(get_alleles)
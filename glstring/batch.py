@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+batch.py
+
+Checking files of GL String records in batches.
+
+Input records are lines of 'id<TAB>GL String', or just 'GL String', in
+which case the line number is used as the id. Each result is written as a
+line of
+
+    line number<TAB>id<TAB>OK or WARNING<TAB>violations
+
+where the line number counts input lines from 0, and violations are ';'
+separated 'check=locus,locus' entries (see glstring.check.get_violations).
+Records that break a complexity guard (see glstring.guards) are written to
+a separate quarantine output as 'line number<TAB>id<TAB>reason' instead.
+
+A run can be split into shards, each of which checks a deterministic part
+of the input, either the records whose id hashes to it, or the lines that
+start in its part of the file's bytes. The result files of the shards are
+merged back into input order by line number with merge_results, and their
+stats with merge_stats.
+
+A run can also write periodic checkpoints of how far it has got: the input
+byte offset and line number after the last record written, the stats so
+far (and the summary, if any), and the sizes of the output files. A run
+resumed from a checkpoint truncates its outputs to those sizes, and reads
+on from that offset, so no record is checked or written twice.
+"""
+
+import heapq
+import json
+import os
+import zlib
+from collections import namedtuple
+from contextlib import nullcontext
+
+from .check import check_all
+from .check import check_many
+from .check import get_violations
+from .guards import Quarantined
+from .guards import guarded
+from .report import Summary
+
+
+# a record read from an input file: its line number, id and GL String, and
+# the byte offset of the end of its line
+Record = namedtuple('Record', ['number', 'id', 'glstring', 'end'])
+
+
+def read_records(f, start=0, end=None, number=None):
+    """
+    Takes a file opened in binary mode, and yields a Record for each
+    non-empty line. If start or end are given, only lines that start at or
+    after byte start, and before byte end, are read, so that ranges that
+    split a file cover each line exactly once. The lines before start are
+    counted to number the lines read, unless number, the line number of
+    the first line read, is given (e.g. from a checkpoint).
+    """
+    if start > 0 and number is not None:
+        # finish the line that start - 1 is in, which belongs to the range
+        # before this one
+        f.seek(start - 1)
+        f.readline()
+    elif start > 0:
+        number = 0
+        f.seek(0)
+        remaining = start - 1
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            number += chunk.count(b'\n')
+            remaining -= len(chunk)
+        if f.readline().endswith(b'\n'):
+            number += 1
+    elif number is None:
+        number = 0
+    position = f.tell() if start > 0 else 0
+    for line in f:
+        if end is not None and position >= end:
+            break
+        position += len(line)
+        text = line.decode().rstrip('\r\n')
+        if text:
+            record_id, tab, glstring = text.rpartition('\t')
+            if not tab:
+                record_id = str(number)
+            yield Record(number, record_id, glstring, position)
+        number += 1
+
+
+def shard_by_hash(records, shard, shards):
+    """
+    Takes an iterable of Records, and yields the ones whose id hashes to
+    shard (counting from 0) of shards
+    """
+    for record in records:
+        if zlib.crc32(record.id.encode()) % shards == shard:
+            yield record
+
+
+def shard_range(f, shard, shards):
+    """
+    Takes a file opened in binary mode, and returns the (start, end) byte
+    range of shard (counting from 0) of shards, for read_records
+    """
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(0)
+    return size * shard // shards, size * (shard + 1) // shards
+
+
+def format_violations(violations):
+    """
+    Takes a list of violations (see glstring.check.get_violations), and
+    returns them as a ';' separated str of 'check=locus,locus' entries
+    """
+    return ';'.join('{}={}'.format(name, ','.join(sorted(loci)))
+                    for name, loci, item in violations)
+
+
+def format_result(number, record_id, violations):
+    """
+    Takes a record number, id and list of violations, and returns the
+    result line for the record
+    """
+    status = 'WARNING' if violations else 'OK'
+    return '{}\t{}\t{}\t{}\n'.format(number, record_id, status,
+                                     format_violations(violations))
+
+
+def write_checkpoint(path, checkpoint):
+    """
+    Takes a path and a checkpoint dict, and atomically replaces the file at
+    path with the checkpoint as JSON
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path):
+    """
+    Takes the path of a checkpoint, and returns the checkpoint dict
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_run_checkpoint(path, record, stats, out, quarantine,
+                         summary=None):
+    """
+    Takes a checkpoint path, the last Record written, the stats so far, the
+    outputs and the Summary (see glstring.report), if any, flushes the
+    outputs, and writes a checkpoint of the run
+    """
+    checkpoint = {
+        'input_offset': record.end,
+        'line': record.number,
+        'stats': stats,
+        'output_offset': None,
+        'quarantine_offset': None,
+        'summary': summary.to_dict() if summary is not None else None,
+    }
+    if out is not None:
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint['output_offset'] = out.tell()
+    if quarantine is not None:
+        quarantine.flush()
+        os.fsync(quarantine.fileno())
+        checkpoint['quarantine_offset'] = quarantine.tell()
+    write_checkpoint(path, checkpoint)
+
+
+def check_violations(glstring):
+    """
+    Takes a GL String, runs all the checks on it (see
+    glstring.check.check_all), and returns its list of violations
+    """
+    return get_violations(check_all(glstring))
+
+
+def write_result(record, result, out, quarantine, stats, summary=None):
+    """
+    Takes a Record and its result (a list of violations, or Quarantined),
+    writes the result line to out (if it is given) or the quarantine line
+    to quarantine (if it is given), and counts it in stats, and in summary
+    (see glstring.report) if it is given
+    """
+    stats['records'] += 1
+    if summary is not None:
+        summary.add(record.id, result)
+    if isinstance(result, Quarantined):
+        stats['quarantined'] += 1
+        if quarantine is not None:
+            quarantine.write('{}\t{}\t{}\n'.format(
+                record.number, record.id, result.reason))
+        return
+    if result:
+        stats['warning'] += 1
+    else:
+        stats['ok'] += 1
+    if out is not None:
+        out.write(format_result(record.number, record.id, result))
+
+
+def new_stats(stats=None):
+    """
+    Takes a stats dict (or None), and returns it with any missing counts
+    set to 0
+    """
+    if stats is None:
+        stats = {}
+    for key in ('records', 'ok', 'warning', 'quarantined'):
+        stats.setdefault(key, 0)
+    return stats
+
+
+def run(records, out, quarantine=None, stats=None, max_length=None,
+        max_tokens=None, max_genotypes=None, seconds=None, checkpoint=None,
+        checkpoint_every=10000, summary=None, profiler=None,
+        progress=None):
+    """
+    Takes an iterable of Records (see read_records), checks each GL String
+    (see glstring.check.check_many), and writes a result line for each
+    record to out (unless it is None). Records that break a limit (see
+    glstring.guards.guarded) are written to quarantine instead, if it is
+    given. If stats is a dict, counts of 'records', 'ok', 'warning' and
+    'quarantined' are kept in it, and if summary (a glstring.report.Summary)
+    is given, each result is counted in it too. If checkpoint is a path, a
+    checkpoint is written to it every checkpoint_every records, and at the
+    end. If profiler (a running glstring.memory.MemoryProfiler) is given,
+    the memory of reading, checking and writing each record is profiled.
+    If progress (a glstring.progress.Progress) is given, it is updated
+    after each record, and reports once more at the end. Returns stats.
+    """
+    stats = new_stats(stats)
+    checker = guarded(check_violations, max_length, max_tokens,
+                      max_genotypes, seconds)
+    if profiler is not None:
+        records = profiler.read(records)
+        checker = profiler.check(checker)
+    if progress is not None:
+        checker = progress.timed(checker)
+    record = None
+    for record, result in check_many(((record, record.glstring)
+                                      for record in records),
+                                     checker=checker):
+        with (profiler.stage('write') if profiler is not None
+              else nullcontext()):
+            write_result(record, result, out, quarantine, stats, summary)
+        if profiler is not None:
+            profiler.written()
+        if progress is not None:
+            progress.update(record, stats)
+        if checkpoint and stats['records'] % checkpoint_every == 0:
+            write_run_checkpoint(checkpoint, record, stats, out, quarantine,
+                                 summary)
+    if checkpoint and record is not None:
+        write_run_checkpoint(checkpoint, record, stats, out, quarantine,
+                             summary)
+    if progress is not None:
+        progress.report()
+    return stats
+
+
+def merge_results(files, out):
+    """
+    Takes a list of result files of shards (each in line number order), and
+    writes their result lines to out merged into line number order
+    """
+    def line_number(line):
+        return int(line.split('\t', 1)[0])
+
+    for line in heapq.merge(*files, key=line_number):
+        out.write(line)
+
+
+def merge_stats(stats_list):
+    """
+    Takes a list of stats dicts (see run), and returns a dict with the
+    counts summed, and their summaries (see glstring.report), if any,
+    merged
+    """
+    merged = {}
+    summary = None
+    for stats in stats_list:
+        for key, value in stats.items():
+            if key == 'summary':
+                if summary is None:
+                    summary = Summary()
+                summary.merge(Summary.from_dict(value))
+            else:
+                merged[key] = merged.get(key, 0) + value
+    if summary is not None:
+        merged['summary'] = summary.to_dict()
+    return merged
@@ -16,17 +16,41 @@ Checks the following...
   genotypes
   allele lists
 
+- optionally, if any allele is not found in a local nomenclature file
+  (see glstring.nomenclature)
+
+check_all runs all of the above on one GL String, and check_many runs
+them on a batch of records, checking each distinct GL String only once.
+
 Note: Both genotypes and genotype lists may contain phased loci,
-      and so these may contain multiple loci
+      and so these may contain multiple loci. For those, each haplotype
+      ('+' separated) is split into positions ('~' separated), and every
+      haplotype of every genotype in the item must have the same locus at
+      each position. Loci that only some haplotypes carry (OPTIONAL_LOCI)
+      are left out of the comparison, so e.g.
+      HLA-DRB5*01:01~HLA-DRB1*15:01+HLA-DRB1*04:01 is OK.
 """
 
+import functools
+import hashlib
+import os
+import shelve
+import tempfile
+
 
 from .glstring import get_loci
+from .glstring import get_alleles
+from .glstring import parse_allele
 from .glstring import get_allele_lists
 from .glstring import get_genotypes
 from .glstring import get_genotype_lists
 
 
+# loci found on some haplotypes only (with the DRB1 alleles of the DR51,
+# DR52 and DR53 groups), which a phased haplotype may or may not include
+OPTIONAL_LOCI = frozenset({'HLA-DRB3', 'HLA-DRB4', 'HLA-DRB5'})
+
+
 def get_duplicates(setlist):
     """
     Takes a list of sets, and returns a set of items that are found in
@@ -39,6 +63,42 @@ def get_duplicates(setlist):
     return duplicates
 
 
+def haplotype_loci(item):
+    """
+    Takes a genotype or genotype list, and returns a tuple of the set of
+    loci found in it, and the set of the locus sequences of its haplotypes.
+    A locus sequence is a tuple of the frozenset of loci at each '~'
+    separated position of a haplotype, leaving out positions of only
+    OPTIONAL_LOCI. The haplotypes are consistent if there is only one
+    locus sequence.
+    """
+    loci = set()
+    haplotypes = set()
+    for genotype in item.split('|'):
+        for haplotype in genotype.split('+'):
+            found, positions = _haplotype_positions(haplotype)
+            loci |= found
+            haplotypes.add(positions)
+    return loci, haplotypes
+
+
+@functools.lru_cache(maxsize=65536)
+def _haplotype_positions(haplotype):
+    """
+    returns the frozenset of loci of a haplotype, and its locus sequence
+    (see haplotype_loci). Memoized, since haplotypes recur.
+    """
+    loci = set()
+    positions = []
+    for allele_list in haplotype.split('~'):
+        position = frozenset(parse_allele(allele).locus
+                             for allele in allele_list.split('/'))
+        loci |= position
+        if not position <= OPTIONAL_LOCI:
+            positions.append(position)
+    return frozenset(loci), tuple(positions)
+
+
 def locus_blocks(glstring):
     """
     Takes a GL String and checks to see if any loci are found in
@@ -65,17 +125,24 @@ def genotype_lists(glstring):
     only unphased genotypes, the text string is either 'OK' (if only one
     locus is found), or 'WARNING' (if more than one locus if found).
     For for genotype lists that contain at lease one phased genotype
-    (containing '~'), the text string is 'Phased - check separately'
+    (containing '~'), and more than one locus, the text string is either
+    'Phased - OK' (if all their haplotypes have the same loci, see
+    haplotype_loci), or 'Phased - WARNING' (if not)
     """
     genotype_lists = get_genotype_lists(glstring)
     checked_gl = []
     for genotype_list in genotype_lists:
-        loci = get_loci(genotype_list)
+        if '~' in genotype_list:
+            loci, haplotypes = haplotype_loci(genotype_list)
+        else:
+            loci = get_loci(genotype_list)
         if len(loci) > 1:
             if '~' not in genotype_list:
                 msg = 'WARNING'
+            elif len(haplotypes) == 1:
+                msg = 'Phased - OK'
             else:
-                msg = 'Phased, check separately'
+                msg = 'Phased - WARNING'
         else:
             msg = 'OK'
         checked_gl.append((genotype_list, loci, msg))
@@ -110,24 +177,127 @@ def genotypes(glstring):
     tuple consists of the genotype, a set of loci found in the genotype,
     and a text string. For unphased genotypes, the text string is either
     'OK' (if only one locus is found), or 'WARNING' (if more than one
-    locus if found). For phased genotypes (containing '~'), the text
-    string is 'Phased - check separately'
+    locus if found). For phased genotypes (containing '~') with more
+    than one locus, the text string is either 'Phased - OK' (if both
+    haplotypes have the same loci, see haplotype_loci), or
+    'Phased - WARNING' (if not)
     """
     genotypes = get_genotypes(glstring)
     checked_gt = []
     for genotype in genotypes:
-        loci = get_loci(genotype)
+        if '~' in genotype:
+            loci, haplotypes = haplotype_loci(genotype)
+        else:
+            loci = get_loci(genotype)
         if len(loci) > 1:
-            if '~' in genotype:
-                msg = 'Phased - Check separately'
-            else:
+            if '~' not in genotype:
                 msg = 'Unphased - WARNING'
+            elif len(haplotypes) == 1:
+                msg = 'Phased - OK'
+            else:
+                msg = 'Phased - WARNING'
         else:
             msg = 'OK'
         checked_gt.append((genotype, loci, msg))
     return checked_gt
 
 
+def alleles(glstring, nomenclature):
+    """
+    Takes a GL String and a Nomenclature (see glstring.nomenclature), and
+    checks to see if each allele is found in the nomenclature. A list of
+    tuples is returned, sorted by allele. Each tuple consists of the allele,
+    a set containing its locus, and a text string. The text string is either
+    'OK' (if the allele is found), or 'WARNING' (if it is not).
+    """
+    checked_a = []
+    for allele in sorted(get_alleles(glstring)):
+        if allele in nomenclature:
+            msg = 'OK'
+        else:
+            msg = 'WARNING'
+        checked_a.append((allele, {parse_allele(allele).locus}, msg))
+    return checked_a
+
+
+def check_all(glstring):
+    """
+    Takes a GL String, and runs the locus block, genotype list, genotype
+    and allele list checks on it. Returns a dict with the set of loci found
+    in more than one locus block under 'locus_blocks', and the lists of
+    tuples returned by genotype_lists, genotypes and allele_lists under
+    their names.
+    """
+    locusblocks, duplicates = locus_blocks(glstring)
+    return {
+        'locus_blocks': duplicates,
+        'genotype_lists': genotype_lists(glstring),
+        'genotypes': genotypes(glstring),
+        'allele_lists': allele_lists(glstring),
+    }
+
+
+def get_violations(checked):
+    """
+    Takes a dict returned by check_all, and returns a list of tuples, one
+    for each WARNING in it. Each tuple consists of the name of the check,
+    a set of the loci involved, and the item that was checked (None for
+    loci found in more than one locus block).
+    """
+    violations = []
+    if checked['locus_blocks']:
+        violations.append(('locus_blocks', checked['locus_blocks'], None))
+    for name in ('genotype_lists', 'genotypes', 'allele_lists'):
+        for item, loci, msg in checked[name]:
+            if 'WARNING' in msg:
+                violations.append((name, loci, item))
+    return violations
+
+
+def check_many(records, stats=None, max_cached=100000, spill_dir=None,
+               checker=check_all):
+    """
+    Takes an iterable of (id, GL String) tuples, and yields an (id, result)
+    tuple for each of them, in the same order, where result is what checker
+    (check_all by default) returns for the GL String. Each distinct GL
+    String is only checked once. Up to max_cached results are kept in
+    memory, and the rest are spilled to a temporary shelf in spill_dir.
+    If stats is a dict, 'records', 'distinct' and 'dedupe_ratio' (records
+    per distinct GL String) are kept up to date in it.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(records=0, distinct=0, dedupe_ratio=0.0)
+    cached = {}
+    spilled = None
+    tmpdir = None
+    try:
+        for record_id, glstring in records:
+            digest = hashlib.blake2b(glstring.encode(),
+                                     digest_size=16).digest()
+            result = cached.get(digest)
+            if result is None and spilled is not None:
+                result = spilled.get(digest.hex())
+            if result is None:
+                result = checker(glstring)
+                stats['distinct'] += 1
+                if len(cached) < max_cached:
+                    cached[digest] = result
+                else:
+                    if spilled is None:
+                        tmpdir = tempfile.TemporaryDirectory(dir=spill_dir)
+                        spilled = shelve.open(
+                            os.path.join(tmpdir.name, 'checked'))
+                    spilled[digest.hex()] = result
+            stats['records'] += 1
+            stats['dedupe_ratio'] = stats['records'] / stats['distinct']
+            yield record_id, result
+    finally:
+        if spilled is not None:
+            spilled.close()
+            tmpdir.cleanup()
+
+
 def printchecked(checked, desc):
     """
     Takes a list of checked items and a description, and prints them.
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+consistency.py
+
+Checking that the GL Strings of the same subject (e.g. a donor typed by
+different labs, or in different rounds) agree with each other.
+
+Input records are read as in glstring.batch, with the subject id as the
+record id, so a subject can have any number of records. The records of
+each subject are grouped, and for each locus typed in two or more of them,
+every pair of records must have an allele in common at that locus. Alleles
+are compared by their fields, so that an allele typed at lower resolution
+matches any allele it is a prefix of (e.g. HLA-A*01:01 matches
+HLA-A*01:01:01:02N), and an allele with no fields matches any allele of
+its locus.
+
+Records can be grouped in one of two ways. If the input is sorted by
+subject id, each subject is checked as soon as its records have been read,
+in a single pass. Otherwise, records are grouped in a dict by subject id
+(a hash join), and if more than max_records are held, all records are
+spilled to partitions on disk by a hash of the subject id, and each
+partition is grouped and checked in turn, so memory stays bounded.
+
+Each conflict is reported as
+
+    subject<TAB>locus<TAB>line number<TAB>line number
+
+with the line numbers of the two records that have no allele in common.
+"""
+
+import itertools
+import os
+import tempfile
+import zlib
+from collections import Counter
+
+from .batch import Record
+from .glstring import get_alleles
+from .glstring import parse_allele
+
+
+def locus_alleles(glstring):
+    """
+    Takes a GL String, and returns a dict of each of its loci to the set of
+    the fields of its alleles at that locus
+    """
+    loci = {}
+    for allele in get_alleles(glstring):
+        parsed = parse_allele(allele)
+        loci.setdefault(parsed.locus, set()).add(parsed.fields)
+    return loci
+
+
+def overlap(fields_a, fields_b):
+    """
+    Takes two sets of allele fields (of the same locus), and returns True
+    if an allele of one is the same as, or a prefix of, an allele of the
+    other
+    """
+    if () in fields_a or () in fields_b:
+        return True
+    by_first = {}
+    for fields in fields_b:
+        by_first.setdefault(fields[0], []).append(fields)
+    for a in fields_a:
+        for b in by_first.get(a[0], ()):
+            n = min(len(a), len(b))
+            if a[:n] == b[:n]:
+                return True
+    return False
+
+
+def check_subject(records):
+    """
+    Takes a list of the Records of one subject, and returns a list of
+    (locus, line number, line number) tuples, one for each pair of records
+    that have no allele in common at a locus both of them type
+    """
+    conflicts = []
+    if len(records) < 2:
+        return conflicts
+    typed = [(record.number, locus_alleles(record.glstring))
+             for record in records]
+    for (number_a, loci_a), (number_b, loci_b) in (
+            itertools.combinations(typed, 2)):
+        for locus in sorted(loci_a.keys() & loci_b.keys()):
+            if not overlap(loci_a[locus], loci_b[locus]):
+                conflicts.append((locus, number_a, number_b))
+    return conflicts
+
+
+def group_sorted(records):
+    """
+    Takes an iterable of Records sorted by id, and yields (subject id,
+    list of Records) tuples. Raises ValueError if the Records turn out not
+    to be sorted.
+    """
+    previous = None
+    for subject, group in itertools.groupby(records,
+                                            key=lambda record: record.id):
+        group = list(group)
+        if previous is not None and subject < previous:
+            raise ValueError('input is not sorted by subject id at line '
+                             '{}'.format(group[0].number))
+        previous = subject
+        yield subject, group
+
+
+def _write_partitions(groups, files, partitions):
+    for subject, records in groups.items():
+        f = files[zlib.crc32(subject.encode()) % partitions]
+        for record in records:
+            f.write('{}\t{}\t{}\n'.format(record.number, record.id,
+                                          record.glstring))
+
+
+def _read_partition(path):
+    groups = {}
+    with open(path) as f:
+        for line in f:
+            number, rest = line.rstrip('\n').split('\t', 1)
+            subject, tab, glstring = rest.rpartition('\t')
+            groups.setdefault(subject, []).append(
+                Record(int(number), subject, glstring, None))
+    return groups
+
+
+def group_hashed(records, max_records=1000000, partitions=16, tmpdir=None):
+    """
+    Takes an iterable of Records in any order, and yields (subject id, list
+    of Records) tuples, grouping them in memory while there are at most
+    max_records of them, and in partitions spilled to tmpdir otherwise
+    """
+    groups = {}
+    held = 0
+    files = None
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        for record in records:
+            groups.setdefault(record.id, []).append(record)
+            held += 1
+            if held > max_records:
+                if files is None:
+                    files = [open(os.path.join(tmp, str(i)), 'w')
+                             for i in range(partitions)]
+                _write_partitions(groups, files, partitions)
+                groups = {}
+                held = 0
+        if files is None:
+            yield from groups.items()
+            return
+        _write_partitions(groups, files, partitions)
+        del groups
+        for f in files:
+            f.close()
+        for f in files:
+            yield from _read_partition(f.name).items()
+
+
+def check_subjects(records, out, presorted=False, stats=None,
+                   max_records=1000000, partitions=16, tmpdir=None):
+    """
+    Takes an iterable of Records (see glstring.batch.read_records) whose
+    ids are subject ids, groups them by subject (in one pass if presorted,
+    see the module docstring), and writes a line to out for each conflict
+    between two records of the same subject. If stats is a dict, counts of
+    'records', 'subjects', 'compared' (subjects with more than one record),
+    'inconsistent' subjects and 'conflicts' by locus are kept in it.
+    Returns stats.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('records', 'subjects', 'compared', 'inconsistent'):
+        stats.setdefault(key, 0)
+    stats.setdefault('conflicts', Counter())
+    if presorted:
+        groups = group_sorted(records)
+    else:
+        groups = group_hashed(records, max_records, partitions, tmpdir)
+    for subject, subject_records in groups:
+        stats['records'] += len(subject_records)
+        stats['subjects'] += 1
+        if len(subject_records) > 1:
+            stats['compared'] += 1
+        conflicts = check_subject(subject_records)
+        if conflicts:
+            stats['inconsistent'] += 1
+        for locus, number_a, number_b in conflicts:
+            stats['conflicts'][locus] += 1
+            out.write('{}\t{}\t{}\t{}\n'.format(subject, locus, number_a,
+                                                number_b))
+    return stats
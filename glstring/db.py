@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+db.py
+
+Checking GL Strings stored in a SQLite table, writing the results back to
+the same table.
+
+Three result columns are added to the table if it does not have them:
+
+    gl_digest      digest of the GL String the results are for
+    gl_status      OK, WARNING or QUARANTINED
+    gl_violations  violations as in glstring.batch, or the quarantine reason
+
+Rows are read in pages ordered by the id column (which must be unique),
+and an index is created on it if it has none, so that reading a page and
+updating a row do not scan the table. A row is only checked if its GL
+String's digest differs from the one stored by the last run, so rerunning
+after a few rows change only checks those rows. Results are written back with executemany, committing once
+every commit_every rows.
+"""
+
+import hashlib
+
+from .batch import check_violations
+from .batch import format_violations
+from .check import check_many
+from .guards import Quarantined
+from .guards import guarded
+
+
+RESULT_COLUMNS = ('gl_digest', 'gl_status', 'gl_violations')
+
+
+def _quote(name):
+    """
+    quotes an SQL identifier
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def digest(glstring):
+    """
+    Takes a GL String, and returns the hex digest stored for it
+    """
+    return hashlib.blake2b(glstring.encode(), digest_size=16).hexdigest()
+
+
+def add_result_columns(conn, table):
+    """
+    Takes a SQLite connection and a table name, and adds any of the result
+    columns that the table does not have yet
+    """
+    columns = {row[1] for row in
+               conn.execute('PRAGMA table_info({})'.format(_quote(table)))}
+    for column in RESULT_COLUMNS:
+        if column not in columns:
+            conn.execute('ALTER TABLE {} ADD COLUMN {} TEXT'.format(
+                _quote(table), _quote(column)))
+    conn.commit()
+
+
+def _has_index(conn, table, column):
+    """
+    returns True if column is the table's rowid alias, or the first column
+    of one of its indexes
+    """
+    primary_key = [row for row in conn.execute(
+        'PRAGMA table_info({})'.format(_quote(table))) if row[5]]
+    if (len(primary_key) == 1 and primary_key[0][1] == column
+            and primary_key[0][2].upper() == 'INTEGER'):
+        return True
+    for index in conn.execute('PRAGMA index_list({})'.format(_quote(table))):
+        first = conn.execute('PRAGMA index_info({})'.format(
+            _quote(index[1]))).fetchone()
+        if first is not None and first[2] == column:
+            return True
+    return False
+
+
+def add_id_index(conn, table, id_column):
+    """
+    Takes a SQLite connection and the names of a table and its id column,
+    and creates an index on the id column, unless it already has one
+    """
+    if not _has_index(conn, table, id_column):
+        conn.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(
+            _quote('gl_{}_{}'.format(table, id_column)), _quote(table),
+            _quote(id_column)))
+        conn.commit()
+
+
+def _pages(conn, table, id_column, glstring_column, page_size):
+    """
+    yields lists of (id, GL String, stored digest) rows, page_size at a
+    time, in id order
+    """
+    select = ('SELECT {id}, {gl}, gl_digest FROM {table} '
+              'WHERE {gl} IS NOT NULL {after} ORDER BY {id} LIMIT ?')
+    names = dict(id=_quote(id_column), gl=_quote(glstring_column),
+                 table=_quote(table))
+    first = select.format(after='', **names)
+    rest = select.format(after='AND {} > ?'.format(names['id']), **names)
+    page = conn.execute(first, (page_size,)).fetchall()
+    while page:
+        yield page
+        page = conn.execute(rest, (page[-1][0], page_size)).fetchall()
+
+
+def check_table(conn, table, id_column='id', glstring_column='glstring',
+                page_size=10000, commit_every=100000, force=False,
+                stats=None, max_length=None, max_tokens=None,
+                max_genotypes=None, seconds=None):
+    """
+    Takes a SQLite connection and the names of a table and its id and GL
+    String columns, checks the GL String of every row whose digest has
+    changed since the last run (or every row, if force is True), and
+    writes the results to the result columns. If stats is a dict, counts of
+    'records', 'unchanged', 'ok', 'warning' and 'quarantined' are kept in
+    it. Returns stats.
+    """
+    if stats is None:
+        stats = {}
+    for key in ('records', 'unchanged', 'ok', 'warning', 'quarantined'):
+        stats.setdefault(key, 0)
+    add_result_columns(conn, table)
+    add_id_index(conn, table, id_column)
+    update = ('UPDATE {} SET gl_digest = ?, gl_status = ?, '
+              'gl_violations = ? WHERE {} = ?'
+              .format(_quote(table), _quote(id_column)))
+    checker = guarded(check_violations, max_length, max_tokens,
+                      max_genotypes, seconds)
+    uncommitted = 0
+    for page in _pages(conn, table, id_column, glstring_column, page_size):
+        changed = []
+        for row_id, glstring, stored in page:
+            stats['records'] += 1
+            row_digest = digest(glstring)
+            if row_digest == stored and not force:
+                stats['unchanged'] += 1
+            else:
+                changed.append(((row_id, row_digest), glstring))
+        results = []
+        for (row_id, row_digest), result in check_many(changed,
+                                                       checker=checker):
+            if isinstance(result, Quarantined):
+                stats['quarantined'] += 1
+                results.append((row_digest, 'QUARANTINED', result.reason,
+                                row_id))
+            else:
+                status = 'WARNING' if result else 'OK'
+                stats[status.lower()] += 1
+                results.append((row_digest, status,
+                                format_violations(result), row_id))
+        conn.executemany(update, results)
+        uncommitted += len(results)
+        if uncommitted >= commit_every:
+            conn.commit()
+            uncommitted = 0
+    conn.commit()
+    return stats
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+diff.py
+
+Differences between the result files of two batch runs (see
+glstring.batch) of the same input, matched by record id and line number,
+since an id can be found on more than one line (e.g. the records of a
+subject).
+
+Each result file is sorted by id and line number with an external merge
+sort, in runs of at most chunk_lines lines, so memory stays bounded
+however large the files are. The sorted results are then merge-joined,
+and the violations of each record compared.
+
+Each differing record is reported as
+
+    id<TAB>line number<TAB>kind<TAB>old violations<TAB>new violations
+
+where kind is new if it had no violations in the old run, fixed if it has
+none in the new run, and changed if it has violations in both, but
+different ones. Violations added and removed are also counted by check
+and by locus. A record found in the results of only one run (e.g. because
+it was quarantined in the other, or not in its input) is reported with
+kind only_old or only_new, and its violations are not counted as added or
+removed, since whether it had any in the other run is not known.
+"""
+
+import heapq
+import os
+import tempfile
+from collections import Counter
+
+
+def _key(row):
+    return row[0], int(row[1])
+
+
+def _sorted_run(rows, tmpdir):
+    """
+    sorts a list of [id, line number, violations] rows, and writes them as
+    lines to a temporary file in tmpdir, returning its path
+    """
+    rows.sort(key=_key)
+    fd, path = tempfile.mkstemp(dir=tmpdir)
+    with os.fdopen(fd, 'w') as f:
+        f.writelines('\t'.join(row) + '\n' for row in rows)
+    return path
+
+
+def _read_run(path):
+    with open(path) as f:
+        for line in f:
+            yield line.rstrip('\n').split('\t')
+
+
+def sort_results(f, tmpdir, chunk_lines=1000000):
+    """
+    Takes a result file and a directory for temporary files, and yields
+    [id, line number, violations] lists for its records, sorted by id and
+    line number
+    """
+    paths = []
+    rows = []
+    for line in f:
+        number, record_id, status, violations = (
+            line.rstrip('\n').split('\t'))
+        rows.append([record_id, number, violations])
+        if len(rows) >= chunk_lines:
+            paths.append(_sorted_run(rows, tmpdir))
+            rows = []
+    if rows:
+        paths.append(_sorted_run(rows, tmpdir))
+    try:
+        yield from heapq.merge(*(_read_run(path) for path in paths),
+                               key=_key)
+    finally:
+        for path in paths:
+            os.remove(path)
+
+
+def _entries(violations):
+    return Counter(violations.split(';')) if violations else Counter()
+
+
+def diff_results(old, new, out, chunk_lines=1000000, tmpdir=None):
+    """
+    Takes the result files of an old and a new run, and writes a line to
+    out for each record whose violations differ, or that is in only one of
+    them (see the module docstring).
+    Returns a dict of counts: of records by kind ('new', 'fixed',
+    'changed'), of records found only in the 'only_old' or 'only_new' run,
+    and of violations 'added' and 'removed', each counted 'by_check' and
+    'by_locus'.
+    """
+    counts = {
+        'new': 0, 'fixed': 0, 'changed': 0, 'only_old': 0, 'only_new': 0,
+        'added': {'by_check': Counter(), 'by_locus': Counter()},
+        'removed': {'by_check': Counter(), 'by_locus': Counter()},
+    }
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        old_rows = sort_results(old, tmp, chunk_lines)
+        new_rows = sort_results(new, tmp, chunk_lines)
+        old_row = next(old_rows, None)
+        new_row = next(new_rows, None)
+        while old_row is not None or new_row is not None:
+            if new_row is None or (old_row is not None
+                                   and _key(old_row) < _key(new_row)):
+                counts['only_old'] += 1
+                out.write('{}\t{}\tonly_old\t{}\t\n'.format(*old_row))
+                old_row = next(old_rows, None)
+                continue
+            if old_row is None or _key(new_row) < _key(old_row):
+                counts['only_new'] += 1
+                out.write('{}\t{}\tonly_new\t\t{}\n'.format(*new_row))
+                new_row = next(new_rows, None)
+                continue
+            before, after = old_row, new_row
+            old_row = next(old_rows, None)
+            new_row = next(new_rows, None)
+            if before[2] == after[2]:
+                continue
+            if not before[2]:
+                kind = 'new'
+            elif not after[2]:
+                kind = 'fixed'
+            else:
+                kind = 'changed'
+            counts[kind] += 1
+            old_entries = _entries(before[2])
+            new_entries = _entries(after[2])
+            for change, entries in (('added', new_entries - old_entries),
+                                    ('removed', old_entries - new_entries)):
+                for entry, count in entries.items():
+                    check, _, loci = entry.partition('=')
+                    counts[change]['by_check'][check] += count
+                    for locus in loci.split(','):
+                        counts[change]['by_locus'][locus] += count
+            out.write('{}\t{}\t{}\t{}\t{}\n'.format(
+                before[0], before[1], kind, before[2], after[2]))
+    return counts
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+encoding.py
+
+Dictionary encoding of GL Strings into flat integer arrays, for holding
+large numbers of GL Strings in memory.
+
+Every allele and locus name is mapped to a small int by a shared, growable
+AlleleDictionary, which also maps each allele id to its locus id. An
+EncodedGlStrings holds any number of GL Strings as one array of allele
+ids, one byte per allele for the delimiter that follows it ('\\0' after the
+last allele of a GL String), and an array of the token offsets of each GL
+String. Locus checks on encoded GL Strings are done on sets of locus ids.
+"""
+
+import array
+import itertools
+import re
+
+from .check import get_duplicates
+from .check import haplotype_loci
+from .glstring import parse_allele
+
+
+# separators that end a segment at each level of a GL String, and the
+# delimiter a segment must contain to be one of that level's items
+LEVELS = {
+    'locus_blocks': ('^', ''),
+    'genotype_lists': ('^', '|'),
+    'genotypes': ('|^', '+'),
+    'allele_lists': ('~+|^', '/'),
+}
+
+
+class AlleleDictionary:
+    """
+    growable mapping of allele and locus names to ints
+    """
+
+    def __init__(self):
+        self.alleles = []
+        self.loci = []
+        self.allele_loci = array.array('I')
+        self._allele_ids = {}
+        self._locus_ids = {}
+
+    def __repr__(self):
+        return ("AlleleDictionary({} alleles, {} loci)"
+                .format(len(self.alleles), len(self.loci)))
+
+    def __len__(self):
+        return len(self.alleles)
+
+    def allele_id(self, allele):
+        """
+        Takes an allele name, and returns its id, adding it (and its locus)
+        to the dictionary if needed
+        """
+        allele_id = self._allele_ids.get(allele)
+        if allele_id is None:
+            allele_id = len(self.alleles)
+            self._allele_ids[allele] = allele_id
+            self.alleles.append(allele)
+            self.allele_loci.append(
+                self.locus_id(parse_allele(allele).locus))
+        return allele_id
+
+    def locus_id(self, locus):
+        """
+        Takes a locus name, and returns its id, adding it to the dictionary
+        if needed
+        """
+        locus_id = self._locus_ids.get(locus)
+        if locus_id is None:
+            locus_id = len(self.loci)
+            self._locus_ids[locus] = locus_id
+            self.loci.append(locus)
+        return locus_id
+
+    def locus_names(self, locus_ids):
+        """
+        Takes an iterable of locus ids, and returns a set of their names
+        """
+        return {self.loci[locus_id] for locus_id in locus_ids}
+
+
+class EncodedGlStrings:
+    """
+    GL Strings held as dictionary encoded flat arrays
+    """
+
+    def __init__(self, dictionary=None):
+        if dictionary is None:
+            dictionary = AlleleDictionary()
+        self.dictionary = dictionary
+        self.ids = array.array('I')
+        self.structure = bytearray()
+        self.offsets = array.array('Q', [0])
+
+    def __repr__(self):
+        return ("EncodedGlStrings({} GL Strings, {} tokens)"
+                .format(len(self), len(self.ids)))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, glstr):
+        """
+        Takes a GL String as a str, encodes it, and returns its number
+        """
+        tokens = re.split(r'([/~+|^])', glstr)
+        allele_id = self.dictionary.allele_id
+        self.ids.extend([allele_id(allele) for allele in tokens[0::2]])
+        self.structure += ''.join(tokens[1::2]).encode() + b'\0'
+        self.offsets.append(len(self.ids))
+        return len(self) - 1
+
+    def extend(self, glstrs):
+        """
+        Takes an iterable of GL Strings as str, and encodes each of them
+        """
+        for glstr in glstrs:
+            self.append(glstr)
+        return self
+
+    def tokens(self, i):
+        """
+        Takes a GL String number, and returns a tuple of the list of its
+        allele ids, and a str of the delimiters that follow each of them
+        """
+        start, end = self.offsets[i], self.offsets[i+1]
+        return (self.ids[start:end].tolist(),
+                self.structure[start:end].decode())
+
+    def __getitem__(self, i):
+        """
+        Takes a GL String number, and returns it decoded as a str
+        """
+        ids, delimiters = self.tokens(i)
+        return ''.join(itertools.chain.from_iterable(
+            zip(map(self.dictionary.alleles.__getitem__, ids),
+                delimiters)))[:-1]
+
+    def loci(self, i):
+        """
+        Takes a GL String number, and returns the set of its locus ids
+        """
+        allele_loci = self.dictionary.allele_loci
+        start, end = self.offsets[i], self.offsets[i+1]
+        return {allele_loci[allele_id] for allele_id in self.ids[start:end]}
+
+    def segments(self, i, level):
+        """
+        Takes a GL String number and a level (a key of LEVELS), and returns
+        a list of tuples, one for each item at that level in the GL String.
+        Each tuple consists of the item's first and last + 1 token offsets
+        within the GL String, the set of its locus ids, and a str of the
+        delimiters found inside it.
+        """
+        separators, required = LEVELS[level]
+        separators += '\0'
+        ids, delimiters = self.tokens(i)
+        allele_loci = self.dictionary.allele_loci
+        segments = []
+        start = 0
+        loci = set()
+        for pos, delimiter in enumerate(delimiters):
+            loci.add(allele_loci[ids[pos]])
+            if delimiter in separators:
+                inside = delimiters[start:pos]
+                if required in inside:
+                    segments.append((start, pos + 1, loci, inside))
+                start = pos + 1
+                loci = set()
+        return segments
+
+    def duplicate_loci(self, i):
+        """
+        Takes a GL String number, and returns the set of locus ids found in
+        more than one of its locus blocks
+        """
+        blocks = [loci for _, _, loci, _
+                  in self.segments(i, 'locus_blocks')]
+        if len(blocks) < 2:
+            return set()
+        return get_duplicates(blocks)
+
+    def multi_locus(self, i, level):
+        """
+        Takes a GL String number and a level ('genotype_lists', 'genotypes'
+        or 'allele_lists'), and returns a list of the items at that level
+        that contain more than one locus, and are either not phased, or
+        phased with haplotypes of different loci (see
+        glstring.check.haplotype_loci), as (first, last + 1) token offsets
+        within the GL String
+        """
+        multi = []
+        for start, end, loci, inside in self.segments(i, level):
+            if len(loci) < 2:
+                continue
+            if '~' in inside:
+                ids = self.tokens(i)[0][start:end]
+                item = ''.join(itertools.chain.from_iterable(zip(
+                    map(self.dictionary.alleles.__getitem__, ids),
+                    inside + '\0')))[:-1]
+                if len(haplotype_loci(item)[1]) == 1:
+                    continue
+            multi.append((start, end))
+        return multi
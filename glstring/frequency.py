@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+frequency.py
+
+Streaming counts of alleles, loci and locus pairs over batches of GL
+Strings.
+
+Each GL String is counted once per allele, locus and pair of loci that it
+contains, in one pass over the string. Counts from separate workers can be
+merged, and written to (or read back from) a tab separated table.
+
+When the number of distinct alleles is too large to count exactly, allele
+counts can be limited to a Misra-Gries heavy hitter summary: at most
+max_alleles alleles are kept, and each count (of a kept allele, or 0 for
+one that was dropped) is an underestimate by at most the total number of
+allele occurrences counted (the sum over records of their distinct
+alleles) divided by (max_alleles + 1).
+"""
+
+from collections import Counter
+from itertools import combinations
+
+from .glstring import get_alleles
+from .glstring import parse_allele
+
+
+class Frequencies:
+    """
+    allele, locus and locus pair counts over a stream of GL Strings
+    """
+
+    def __init__(self, max_alleles=None):
+        self.max_alleles = max_alleles
+        self.records = 0
+        self.alleles = Counter()
+        self.loci = Counter()
+        self.locus_pairs = Counter()
+
+    def __repr__(self):
+        return ("Frequencies({} records, {} alleles, {} loci)"
+                .format(self.records, len(self.alleles), len(self.loci)))
+
+    def add(self, glstr):
+        """
+        Takes a GL String as a str, and adds its alleles, loci and locus
+        pairs to the counts
+        """
+        self.records += 1
+        alleles = get_alleles(glstr)
+        loci = sorted({parse_allele(allele).locus for allele in alleles})
+        self.alleles.update(alleles)
+        self.loci.update(loci)
+        self.locus_pairs.update(combinations(loci, 2))
+        # trimming is amortized by letting the summary grow to twice its
+        # size before cutting it back
+        if (self.max_alleles is not None
+                and len(self.alleles) > 2 * self.max_alleles):
+            self._trim()
+
+    def update(self, glstrs):
+        """
+        Takes an iterable of GL Strings, and adds each of them to the counts
+        """
+        for glstr in glstrs:
+            self.add(glstr)
+        return self
+
+    def merge(self, other):
+        """
+        Takes another Frequencies, e.g. from a parallel worker, and adds its
+        counts to these
+        """
+        self.records += other.records
+        self.alleles.update(other.alleles)
+        self.loci.update(other.loci)
+        self.locus_pairs.update(other.locus_pairs)
+        if self.max_alleles is not None:
+            self._trim()
+        return self
+
+    def _trim(self):
+        """
+        Misra-Gries step: if more than max_alleles alleles are counted,
+        subtract the (max_alleles + 1)th largest count from every allele,
+        and drop the alleles that reach zero
+        """
+        if len(self.alleles) <= self.max_alleles:
+            return
+        counts = sorted(self.alleles.values(), reverse=True)
+        cut = counts[self.max_alleles]
+        self.alleles = Counter({allele: count - cut
+                                for allele, count in self.alleles.items()
+                                if count > cut})
+
+    def write(self, f):
+        """
+        Takes a writable text file, and writes the counts to it as tab
+        separated lines of kind, name and count
+        """
+        if self.max_alleles is not None:
+            self._trim()
+        f.write('records\t\t{}\n'.format(self.records))
+        for kind, counts in (('allele', self.alleles),
+                             ('locus', self.loci),
+                             ('locus_pair', self.locus_pairs)):
+            for name, count in counts.most_common():
+                if kind == 'locus_pair':
+                    name = '+'.join(name)
+                f.write('{}\t{}\t{}\n'.format(kind, name, count))
+
+    @classmethod
+    def read(cls, f, max_alleles=None):
+        """
+        Takes a text file written by Frequencies.write, and returns the
+        Frequencies it contains
+        """
+        frequencies = cls(max_alleles)
+        for line in f:
+            kind, name, count = line.rstrip('\n').split('\t')
+            if kind == 'records':
+                frequencies.records = int(count)
+            elif kind == 'allele':
+                frequencies.alleles[name] = int(count)
+            elif kind == 'locus':
+                frequencies.loci[name] = int(count)
+            elif kind == 'locus_pair':
+                frequencies.locus_pairs[tuple(name.split('+'))] = int(count)
+        return frequencies
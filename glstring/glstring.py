@@ -5,10 +5,27 @@ glstring.py
 functions for getting loci, alleles, allele lists, genotypes, genotype lists
 and locus blocks from a GL String
 
+also contains a memoized parser for allele names, and functions for
+parsing a GL String into its nested structure, reducing it to a lower
+resolution, counting the unambiguous genotypes it implies, and lazily
+expanding them.
+
 also contains class for GlString with methods to do the above.
 """
 
+import functools
+import itertools
 import re
+from collections import namedtuple
+
+
+Allele = namedtuple('Allele', ['locus', 'fields', 'suffix'])
+
+# an allele name's last field may end in an expression (N, L, S, Q, C, A)
+# or group (G, P) suffix
+_SUFFIX = re.compile(r'(\d+)([A-Z]+)$')
+_EXPRESSION_SUFFIXES = 'NLSQCA'
+_DELIMITER = re.compile(r'[/~+|^]')
 
 
 class GlString:
@@ -30,7 +47,7 @@ class GlString:
         alleles = get_alleles(self.gls)
         loci = set()
         for allele in alleles:
-            loci.add(allele.split('*')[0])
+            loci.add(parse_allele(allele).locus)
         return loci
 
     def alleles(self):
@@ -116,6 +133,26 @@ class GlString:
         return haplotypes
 
 
+@functools.lru_cache(maxsize=65536)
+def parse_allele(allele):
+    """
+    Takes an allele name as a str, e.g. 'HLA-A*01:01:01:02N', and returns an
+    Allele tuple of its locus ('HLA-A'), fields (('01', '01', '01', '02'))
+    and suffix ('N'). A name without '*' is all locus, with no fields.
+    Results are memoized, since the same allele names recur in every GL
+    String.
+    """
+    locus, star, name = allele.partition('*')
+    if not star:
+        return Allele(locus, (), '')
+    fields = name.split(':')
+    suffix = ''
+    match = _SUFFIX.match(fields[-1])
+    if match:
+        fields[-1], suffix = match.groups()
+    return Allele(locus, tuple(fields), suffix)
+
+
 def get_loci(glstr):
     """
     Takes GL String as a str, and returns a set containing all the loci
@@ -123,7 +160,7 @@ def get_loci(glstr):
     alleles = get_alleles(glstr)
     loci = set()
     for allele in alleles:
-        loci.add(allele.split('*')[0])
+        loci.add(parse_allele(allele).locus)
     return loci
 
 
@@ -214,6 +251,229 @@ def get_haplotypes(glstr):
     return haplotypes
 
 
+def parse(glstr):
+    """
+    Take a GL String as str, and return its nested structure as lists:
+    locus blocks -> genotypes ('|') -> genotype sides ('+') ->
+    phased positions ('~') -> alleles ('/')
+    """
+    parsed = []
+    for locus_block in glstr.split('^'):
+        genotypes = []
+        for genotype in locus_block.split('|'):
+            sides = []
+            for side in genotype.split('+'):
+                sides.append([allele_list.split('/')
+                              for allele_list in side.split('~')])
+            genotypes.append(sides)
+        parsed.append(genotypes)
+    return parsed
+
+
+def _count_genotype(positions):
+    """
+    Take the sides of a genotype, as lists of the set of alleles at each
+    phased position, and return the number of distinct unambiguous
+    genotypes it implies, with its two sides unordered
+    """
+    count = 1
+    for side in positions:
+        for alleles in side:
+            count *= len(alleles)
+    if len(positions) == 2 and len(positions[0]) == len(positions[1]):
+        # haplotypes that both sides can hold are counted twice as
+        # (a, b) and (b, a)
+        shared = 1
+        for first, second in zip(*positions):
+            shared *= len(first & second)
+        count -= shared * (shared - 1) // 2
+    return count
+
+
+def count_genotypes(glstr):
+    """
+    Take a GL String as str, and return a tuple containing a list with the
+    number of unambiguous genotypes implied by each locus block, and the
+    number implied by the whole GL String. Counts are computed in one scan
+    over the delimiters, holding the alleles of one genotype at a time,
+    without parsing or expanding the GL String. The two sides of a genotype
+    are unordered, so A+B and B+A are one genotype, and repeated alleles in
+    an allele list count once. A genotype implied by more than one genotype
+    of a genotype list is counted once for each of them, so the count is
+    exact for each genotype, and an upper bound for a genotype list
+    (expand_genotypes yields each distinct genotype once).
+    """
+    block_counts = []
+    count = 0
+    positions = [[set()]]
+    start = 0
+    for match in _DELIMITER.finditer(glstr):
+        positions[-1][-1].add(glstr[start:match.start()])
+        start = match.end()
+        delimiter = match.group()
+        if delimiter == '~':
+            positions[-1].append(set())
+        elif delimiter == '+':
+            positions.append([set()])
+        elif delimiter in '|^':
+            count += _count_genotype(positions)
+            positions = [[set()]]
+            if delimiter == '^':
+                block_counts.append(count)
+                count = 0
+    positions[-1][-1].add(glstr[start:])
+    block_counts.append(count + _count_genotype(positions))
+    total = 1
+    for count in block_counts:
+        total *= count
+    return block_counts, total
+
+
+def to_glstring(parsed):
+    """
+    Take a parsed GL String (as returned by parse), and return it as a str
+    """
+    return '^'.join(
+        '|'.join(
+            '+'.join(
+                '~'.join('/'.join(allele_list) for allele_list in side)
+                for side in genotype)
+            for genotype in locus_block)
+        for locus_block in parsed)
+
+
+@functools.lru_cache(maxsize=65536)
+def truncate_allele(allele, fields):
+    """
+    Takes an allele name as a str and a number of fields, and returns the
+    name truncated to that many fields. An expression suffix (e.g. 'N') is
+    kept, but a G or P group suffix is dropped, since it does not apply to
+    the truncated name. Names with no more fields than asked for are
+    returned unchanged.
+    """
+    parsed = parse_allele(allele)
+    if len(parsed.fields) <= fields:
+        return allele
+    suffix = parsed.suffix if parsed.suffix in _EXPRESSION_SUFFIXES else ''
+    return (parsed.locus + '*' + ':'.join(parsed.fields[:fields]) + suffix)
+
+
+def reduce_resolution(glstr, fields=2):
+    """
+    Take a GL String as str and a number of fields, and return the GL String
+    with every allele truncated to that many fields. Alleles repeated in an
+    allele list, and genotypes repeated in a genotype list, by the
+    truncation are collapsed to their first occurrence. The two sides of a
+    genotype are unordered, so A+B and B+A are the same genotype.
+    """
+    reduced = []
+    for locus_block in parse(glstr):
+        genotypes = {}
+        for genotype in locus_block:
+            sides = []
+            for side in genotype:
+                sides.append([
+                    list(dict.fromkeys(truncate_allele(allele, fields)
+                                       for allele in allele_list))
+                    for allele_list in side])
+            key = tuple(sorted(to_glstring([[[side]]]) for side in sides))
+            genotypes.setdefault(key, sides)
+        reduced.append(list(genotypes.values()))
+    return to_glstring(reduced)
+
+
+def reduce_resolutions(glstrs, fields=2):
+    """
+    Take an iterable of GL Strings as str and a number of fields, and yield
+    each GL String reduced to that resolution (see reduce_resolution)
+    """
+    for glstr in glstrs:
+        yield reduce_resolution(glstr, fields)
+
+
+def _holds(positions, sides):
+    """
+    returns True if each side is a haplotype of the allele sets at each
+    position of the corresponding side of positions
+    """
+    return (len(positions) == len(sides)
+            and all(len(side) == len(sets)
+                    and all(allele in alleles
+                            for allele, alleles in zip(side, sets))
+                    for side, sets in zip(sides, positions)))
+
+
+def _implies(positions, sides):
+    """
+    returns True if a genotype (given as the allele sets at each position
+    of its sides) implies the unambiguous genotype sides, in either order
+    """
+    return (_holds(positions, sides)
+            or len(sides) == 2 and _holds(positions, sides[::-1]))
+
+
+def _expand_locus_block(locus_block):
+    """
+    Take a parsed locus block, and yield its distinct unambiguous genotypes
+    as str, with the sides of each in sorted order. The two sides of a
+    genotype are unordered, so of A+B and B+A only one is yielded, and a
+    genotype implied by more than one genotype of a genotype list is only
+    yielded for the first of them.
+    """
+    earlier = []
+    for genotype in locus_block:
+        genotype = [[list(dict.fromkeys(allele_list))
+                     for allele_list in side] for side in genotype]
+        shape = [len(side) for side in genotype]
+        allele_lists = [allele_list for side in genotype
+                        for allele_list in side]
+        positions = [[set(allele_list) for allele_list in side]
+                     for side in genotype]
+        symmetric = len(shape) == 2 and shape[0] == shape[1]
+        for alleles in itertools.product(*allele_lists):
+            sides = []
+            start = 0
+            for length in shape:
+                sides.append(alleles[start:start+length])
+                start += length
+            # skip (b, a) if (a, b) is also implied
+            if (symmetric and sides[0] > sides[1]
+                    and _holds(positions, sides[::-1])):
+                continue
+            if any(_implies(other, sides) for other in earlier):
+                continue
+            yield '+'.join(sorted('~'.join(side) for side in sides))
+        earlier.append(positions)
+
+
+def _expand_locus_blocks(locus_blocks):
+    """
+    Take a list of parsed locus blocks, and lazily yield tuples with one
+    unambiguous genotype per block. Unlike itertools.product, the
+    expansions of the blocks are never held in memory.
+    """
+    if not locus_blocks:
+        yield ()
+        return
+    for genotype in _expand_locus_block(locus_blocks[0]):
+        for rest in _expand_locus_blocks(locus_blocks[1:]):
+            yield (genotype,) + rest
+
+
+def expand_genotypes(glstr, limit=None):
+    """
+    Take a GL String as str, and lazily yield each distinct unambiguous GL
+    String it implies (no allele lists or genotype lists), with the sides
+    of each genotype in sorted order. If limit is given, stop after that
+    many have been yielded.
+    """
+    expanded = _expand_locus_blocks(parse(glstr))
+    if limit is not None:
+        expanded = itertools.islice(expanded, limit)
+    for locus_blocks in expanded:
+        yield '^'.join(locus_blocks)
+
+
 def main():
     pass
 
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+guards.py
+
+Complexity guards for checking GL Strings in batches, so that one
+pathological record cannot stall a batch.
+
+Limits on length, token count and number of implied genotypes are checked
+up front, cheapest first, and the check itself can be given a time budget.
+A record that breaks a limit is not checked; a Quarantined tuple with the
+reason is returned in place of its result.
+"""
+
+import signal
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .glstring import count_genotypes
+
+
+Quarantined = namedtuple('Quarantined', ['reason'])
+
+
+class TimeBudgetExceeded(Exception):
+    """
+    raised when a check runs past its time budget
+    """
+
+
+def check_limits(glstring, max_length=None, max_tokens=None,
+                 max_genotypes=None):
+    """
+    Takes a GL String and limits on its length, number of alleles, and
+    number of unambiguous genotypes it implies (see count_genotypes), and
+    returns None if it is within all of them, or the reason if not.
+    Limits that are None are not checked.
+    """
+    if max_length is not None and len(glstring) > max_length:
+        return 'length {} > {}'.format(len(glstring), max_length)
+    if max_tokens is not None:
+        tokens = 1 + sum(glstring.count(delimiter) for delimiter in '^|+~/')
+        if tokens > max_tokens:
+            return 'tokens {} > {}'.format(tokens, max_tokens)
+    if max_genotypes is not None:
+        block_counts, genotypes = count_genotypes(glstring)
+        if genotypes > max_genotypes:
+            return 'genotypes {} > {}'.format(genotypes, max_genotypes)
+    return None
+
+
+def _raise_time_budget_exceeded(signum, frame):
+    raise TimeBudgetExceeded()
+
+
+@contextmanager
+def time_budget(seconds):
+    """
+    Context manager that raises TimeBudgetExceeded if its block runs for
+    more than seconds. The block is interrupted with SIGALRM where that is
+    possible (POSIX, main thread); elsewhere this does nothing, and callers
+    have to check the elapsed time themselves.
+    """
+    if (seconds is None or not hasattr(signal, 'setitimer')
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_time_budget_exceeded)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def guarded(checker, max_length=None, max_tokens=None, max_genotypes=None,
+            seconds=None):
+    """
+    Takes a checker function (e.g. glstring.check.check_all) and limits,
+    and returns a function that takes a GL String, and returns what checker
+    returns for it, or a Quarantined tuple if it breaks a limit (see
+    check_limits) or its check takes more than seconds
+    """
+    def guarded_checker(glstring):
+        reason = check_limits(glstring, max_length, max_tokens,
+                              max_genotypes)
+        if reason is not None:
+            return Quarantined(reason)
+        start = time.perf_counter()
+        try:
+            with time_budget(seconds):
+                result = checker(glstring)
+        except TimeBudgetExceeded:
+            return Quarantined('time > {}s'.format(seconds))
+        if seconds is not None and time.perf_counter() - start > seconds:
+            return Quarantined('time > {}s'.format(seconds))
+        return result
+    return guarded_checker
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+index.py
+
+Inverted index from alleles and loci to the records that carry them,
+built over a batch of (id, GL String) records.
+
+Postings are sorted arrays of record numbers (the position of a record in
+the batch), which can be combined with intersect() and union(), and turned
+back into record ids with AlleleIndex.ids(). An index can be saved to disk
+and loaded again with the postings memory mapped rather than read.
+"""
+
+import array
+import bisect
+import json
+import mmap
+import struct
+
+from .glstring import get_alleles
+from .glstring import parse_allele
+
+
+MAGIC = b'GLIX'
+HEADER = struct.Struct('<4sI')
+
+
+class AlleleIndex:
+    """
+    inverted index of alleles and loci to record numbers
+    """
+
+    def __init__(self, ids, alleles, loci):
+        self.record_ids = ids
+        self._alleles = alleles
+        self._loci = loci
+        self._names = sorted(alleles)
+
+    def __repr__(self):
+        return ("AlleleIndex({} records, {} alleles, {} loci)"
+                .format(len(self.record_ids), len(self._alleles),
+                        len(self._loci)))
+
+    def __len__(self):
+        return len(self.record_ids)
+
+    def allele(self, allele):
+        """
+        Takes an allele name, and returns the sorted record numbers of the
+        records that carry it
+        """
+        return self._alleles.get(allele, array.array('I'))
+
+    def locus(self, locus):
+        """
+        Takes a locus name, and returns the sorted record numbers of the
+        records that carry any allele of that locus
+        """
+        return self._loci.get(locus, array.array('I'))
+
+    def prefix(self, prefix):
+        """
+        Takes an allele name prefix, e.g. 'HLA-DRB1*04', and returns the
+        sorted record numbers of the records that carry any allele whose
+        name starts with it. The prefix only matches whole fields, so
+        'HLA-DRB1*04' matches 'HLA-DRB1*04:01' but not 'HLA-DRB1*041:01'.
+        """
+        postings = []
+        names = self._names
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            name = names[i]
+            if not name.startswith(prefix):
+                break
+            if len(name) > len(prefix) and name[len(prefix)].isdigit():
+                continue
+            postings.append(self._alleles[name])
+        return union(*postings)
+
+    def ids(self, postings):
+        """
+        Takes a sequence of record numbers, and returns a list of the
+        corresponding record ids
+        """
+        return [self.record_ids[i] for i in postings]
+
+    def save(self, path):
+        """
+        Writes the index to path. The header (record ids and the offsets of
+        the postings) is JSON, and the postings follow as one array of
+        unsigned 32 bit ints.
+        """
+        postings = array.array('I')
+        alleles = []
+        for name in self._names:
+            alleles.append((name, len(postings), len(self._alleles[name])))
+            postings.extend(self._alleles[name])
+        loci = []
+        for name in sorted(self._loci):
+            loci.append((name, len(postings), len(self._loci[name])))
+            postings.extend(self._loci[name])
+        header = json.dumps({'ids': self.record_ids,
+                             'alleles': alleles,
+                             'loci': loci}).encode()
+        # pad so that the postings are aligned for memoryview.cast()
+        header += b' ' * (-(HEADER.size + len(header)) % postings.itemsize)
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            postings.tofile(f)
+
+
+def build_index(records):
+    """
+    Takes an iterable of (id, GL String) tuples, and returns an AlleleIndex
+    of the alleles and loci found in them. Record ids must be JSON
+    serializable if the index is to be saved.
+    """
+    ids = []
+    alleles = {}
+    loci = {}
+    for number, (record_id, glstr) in enumerate(records):
+        ids.append(record_id)
+        record_loci = set()
+        for allele in get_alleles(glstr):
+            alleles.setdefault(allele, array.array('I')).append(number)
+            record_loci.add(parse_allele(allele).locus)
+        for locus in record_loci:
+            loci.setdefault(locus, array.array('I')).append(number)
+    return AlleleIndex(ids, alleles, loci)
+
+
+def load_index(path):
+    """
+    Takes the path of a saved index, and returns an AlleleIndex whose
+    postings are read lazily from a memory map of the file
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, header_size = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError("{} is not a saved allele index".format(path))
+    start = HEADER.size + header_size
+    header = json.loads(mapped[HEADER.size:start].decode())
+    postings = memoryview(mapped)[start:].cast('I')
+    alleles = {name: postings[offset:offset+length]
+               for name, offset, length in header['alleles']}
+    loci = {name: postings[offset:offset+length]
+            for name, offset, length in header['loci']}
+    return AlleleIndex(header['ids'], alleles, loci)
+
+
+def intersect(*postings):
+    """
+    Takes sorted sequences of record numbers, and returns a sorted array of
+    the record numbers found in all of them
+    """
+    if not postings:
+        return array.array('I')
+    postings = sorted(postings, key=len)
+    found = set(postings[0])
+    for other in postings[1:]:
+        if not found:
+            break
+        found.intersection_update(other)
+    return array.array('I', sorted(found))
+
+
+def union(*postings):
+    """
+    Takes sorted sequences of record numbers, and returns a sorted array of
+    the record numbers found in any of them
+    """
+    found = set()
+    for other in postings:
+        found.update(other)
+    return array.array('I', sorted(found))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+mac.py
+
+Expansion of NMDP multiple allele codes (MACs), e.g. 'HLA-A*01:AB', into
+allele lists, e.g. 'HLA-A*01:01/HLA-A*01:02', using a local code table.
+
+The table is read from an NMDP alpha.v3.txt style file, with lines of
+(optional '*' marker), code and subtypes, e.g. '*\tAB\t01/02'. Subtypes
+are either second fields only ('01/02'), which keep the first field of the
+coded allele, or first and second fields ('01:01/02:01'). The first time a
+table is loaded, its codes are written next to it as a JSON object
+('<file>.cache'), and later loads read that copy instead of parsing the
+text file again. JSON is plain data, so loading a cache that someone else
+could write cannot run code.
+"""
+
+import functools
+import json
+import os
+import re
+
+from .glstring import parse_allele
+
+
+_ALLELE = re.compile(r'[^/~+|^]+')
+
+
+class MacTable:
+    """
+    multiple allele codes, and the subtypes they expand to
+    """
+
+    def __init__(self, codes):
+        self.codes = codes
+        self.expand_allele = functools.lru_cache(
+            maxsize=65536)(self._expand_allele)
+
+    def __repr__(self):
+        return "MacTable({} codes)".format(len(self.codes))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _expand_allele(self, allele):
+        """
+        Takes an allele name, and returns it as a '/' separated allele list
+        if its second field is a code in the table, or unchanged if not
+        """
+        parsed = parse_allele(allele)
+        if len(parsed.fields) != 2 or parsed.fields[1] not in self.codes:
+            return allele
+        first = parsed.fields[0]
+        expanded = []
+        for subtype in self.codes[parsed.fields[1]].split('/'):
+            if ':' not in subtype:
+                subtype = first + ':' + subtype
+            expanded.append(parsed.locus + '*' + subtype)
+        return '/'.join(expanded)
+
+    def expand(self, glstr):
+        """
+        Takes a GL String as a str, and returns it with every multiple
+        allele code expanded into an allele list
+        """
+        return _ALLELE.sub(lambda m: self.expand_allele(m.group()), glstr)
+
+
+def read_codes(path):
+    """
+    Takes the path of a code table file, and returns a dict of codes to
+    their '/' separated subtypes. The '*<TAB>CODE<TAB>SUBTYPE' header line
+    is skipped.
+    """
+    codes = {}
+    with open(path) as f:
+        for line in f:
+            columns = line.split()
+            if (len(columns) < 2 or not columns[-2].isalpha()
+                    or columns[-2:] == ['CODE', 'SUBTYPE']):
+                continue
+            codes[columns[-2]] = columns[-1]
+    return codes
+
+
+def load_macs(path, cache=True):
+    """
+    Takes the path of a code table file, and returns a MacTable of the codes
+    in it. If cache is True, the JSON copy next to the file is used when it
+    is newer than the file, and written otherwise (if it can be).
+    """
+    if not cache:
+        return MacTable(read_codes(path))
+    cache_path = path + '.cache'
+    if (os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+        with open(cache_path) as f:
+            return MacTable(json.load(f))
+    codes = read_codes(path)
+    tmp = cache_path + '.tmp'
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(codes, f, separators=(',', ':'))
+        os.replace(tmp, cache_path)
+    except OSError:
+        # e.g. a read-only directory; use the codes without caching them
+        pass
+    return MacTable(codes)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+memory.py
+
+Memory profiling of batch runs (see glstring.batch) with tracemalloc.
+
+While a MemoryProfiler is running, each read, check and write of a record
+is a stage, and for each stage the number of times it ran, the memory
+traced at its end, and the highest peak it reached above the memory traced
+at its start are kept. The peak of each check is also kept for the records
+that needed the most memory. Every so many records, a snapshot of the
+allocation sites holding the most memory is taken, so that growth (e.g. of
+caches) can be told apart from the memory a single record needs.
+
+The report is written as JSON, so that runs before and after a change can
+be compared. tracemalloc slows a run down several times, so this is only
+for finding out where the memory goes, not for production runs.
+"""
+
+import heapq
+import json
+import tracemalloc
+from contextlib import contextmanager
+
+
+class MemoryProfiler:
+    """
+    tracemalloc based memory profile of the stages of a batch run
+    """
+
+    def __init__(self, every=10000, top=10, frames=1):
+        self.every = every
+        self.top = top
+        self.frames = frames
+        self.stages = {}
+        self.largest = []
+        self.snapshots = []
+        self.records = 0
+        self.peak = 0
+        self._current = None
+        self._last_peak = 0
+
+    def __repr__(self):
+        return 'MemoryProfiler({} records)'.format(self.records)
+
+    def start(self):
+        tracemalloc.start(self.frames)
+
+    def stop(self):
+        """
+        Takes a last snapshot, and stops tracing
+        """
+        if tracemalloc.is_tracing():
+            self.snapshot()
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager that counts its block as a run of stage name
+        """
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            stage = self.stages.setdefault(
+                name, {'calls': 0, 'current': 0, 'peak': 0})
+            stage['calls'] += 1
+            stage['current'] = current
+            stage['peak'] = max(stage['peak'], peak - start)
+            self._last_peak = peak - start
+            self.peak = max(self.peak, peak)
+
+    def read(self, records):
+        """
+        Takes an iterable of Records, and yields them, counting each read
+        as the read stage
+        """
+        iterator = iter(records)
+        while True:
+            with self.stage('read'):
+                record = next(iterator, None)
+            if record is None:
+                return
+            self._current = record
+            yield record
+
+    def check(self, checker):
+        """
+        Takes a checker (a function of a GL String), and returns it
+        wrapped so that each check counts as the check stage, and the
+        records whose checks peaked highest are kept
+        """
+        def profiled(glstring):
+            with self.stage('check'):
+                result = checker(glstring)
+            record_id = (self._current.id if self._current is not None
+                         else '')
+            entry = (self._last_peak, record_id, len(glstring))
+            if len(self.largest) < self.top:
+                heapq.heappush(self.largest, entry)
+            else:
+                heapq.heappushpop(self.largest, entry)
+            return result
+        return profiled
+
+    def written(self):
+        """
+        Counts a record written, taking a snapshot every so many records
+        """
+        self.records += 1
+        if self.every and self.records % self.every == 0:
+            self.snapshot()
+
+    def snapshot(self):
+        """
+        Takes a snapshot of the current memory, and of the allocation sites
+        holding the most of it
+        """
+        current = tracemalloc.get_traced_memory()[0]
+        statistics = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        )).statistics('traceback' if self.frames > 1 else 'lineno')
+        self.snapshots.append({
+            'records': self.records,
+            'current': current,
+            'sites': [{'site': [str(frame) for frame in stat.traceback],
+                       'size': stat.size,
+                       'count': stat.count}
+                      for stat in statistics[:self.top]],
+        })
+
+    def report(self):
+        """
+        Returns the profile as a dict of the records written, the highest
+        'peak' traced, the 'stages', the 'largest_records' (peak, id and
+        length of each, biggest first) and the 'snapshots'
+        """
+        return {
+            'records': self.records,
+            'peak': self.peak,
+            'stages': self.stages,
+            'largest_records': [
+                {'peak': peak, 'id': record_id, 'length': length}
+                for peak, record_id, length in sorted(self.largest,
+                                                      reverse=True)],
+            'snapshots': self.snapshots,
+        }
+
+    def write(self, path):
+        """
+        Takes a path, and writes the report to it as JSON
+        """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+nomenclature.py
+
+Validation of allele names against a local nomenclature file, e.g. an
+IMGT/HLA Allelelist.txt ('HLA00001,A*01:01:01:01' lines), or a file with
+one allele name per line.
+
+The names are held as a sorted array and looked up by binary search. The
+first time a nomenclature file is loaded, a binary copy of the sorted
+names is written next to it ('<file>.cache'), and later loads memory map
+that copy instead of reading and sorting the text file again. If the
+copy cannot be written (e.g. the file is in a read-only directory), the
+names are read from the text file every time.
+"""
+
+import array
+import bisect
+import functools
+import mmap
+import os
+import struct
+
+
+# magic, number of names, length of the prefix, which follows the header
+MAGIC = b'GLN2'
+HEADER = struct.Struct('<4sII')
+
+
+class _Names:
+    """
+    sorted sequence of allele names, decoded on access from a blob of
+    concatenated names and an array of their offsets
+    """
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(
+            self._blob[self._offsets[i]:self._offsets[i+1]]).decode()
+
+
+class Nomenclature:
+    """
+    sorted set of valid allele names
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.is_valid = functools.lru_cache(maxsize=65536)(self._is_valid)
+
+    def __repr__(self):
+        return "Nomenclature({} alleles)".format(len(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, allele):
+        return self.is_valid(allele)
+
+    def _is_valid(self, allele):
+        """
+        Takes an allele name, and returns True if it is in the nomenclature,
+        either in full or truncated to fewer fields (so 'HLA-A*01:01' is
+        valid if 'HLA-A*01:01:01:01' is)
+        """
+        i = bisect.bisect_left(self.names, allele)
+        if i == len(self.names):
+            return False
+        name = self.names[i]
+        if name == allele:
+            return True
+        i = bisect.bisect_left(self.names, allele + ':', i)
+        return (i < len(self.names)
+                and self.names[i].startswith(allele + ':'))
+
+
+def read_names(path, prefix='HLA-'):
+    """
+    Takes the path of a nomenclature file, and returns a sorted list of the
+    allele names in it. Comment lines starting with '#' and the
+    'AlleleID,Allele' header are skipped, only the last comma separated
+    column is used, and prefix is added to names that do not start with it.
+    """
+    names = set()
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name = line.split(',')[-1]
+            if name == 'Allele':
+                continue
+            if not name.startswith(prefix):
+                name = prefix + name
+            names.add(name)
+    return sorted(names)
+
+
+def write_cache(names, path, prefix='HLA-'):
+    """
+    Takes a sorted list of allele names and the prefix they were read with,
+    and writes them to path in the binary form read by read_cache
+    """
+    blob = bytearray()
+    offsets = array.array('I', [0])
+    for name in names:
+        blob += name.encode()
+        offsets.append(len(blob))
+    encoded_prefix = prefix.encode()
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(names), len(encoded_prefix)))
+        f.write(encoded_prefix)
+        offsets.tofile(f)
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+def read_cache(path, prefix='HLA-'):
+    """
+    Takes the path of a binary nomenclature cache and the prefix its names
+    should have been read with, and returns its names as a sequence backed
+    by a memory map of the file, or None if the cache used another prefix
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, count, prefix_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError("{} is not a nomenclature cache".format(path))
+    start = HEADER.size + prefix_length
+    if mapped[HEADER.size:start] != prefix.encode():
+        return None
+    end = start + (count + 1) * 4
+    offsets = memoryview(mapped)[start:end].cast('I')
+    return _Names(memoryview(mapped)[end:], offsets)
+
+
+def load_nomenclature(path, prefix='HLA-', cache=True):
+    """
+    Takes the path of a nomenclature file, and returns a Nomenclature of the
+    allele names in it. If cache is True, the binary cache next to the file
+    is used when it is newer than the file, and written otherwise (if it
+    can be).
+    """
+    if not cache:
+        return Nomenclature(read_names(path, prefix))
+    cache_path = path + '.cache'
+    names = None
+    if (os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+        names = read_cache(cache_path, prefix)
+    if names is None:
+        names = read_names(path, prefix)
+        try:
+            write_cache(names, cache_path, prefix)
+        except OSError:
+            return Nomenclature(names)
+        names = read_cache(cache_path, prefix)
+    return Nomenclature(names)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+
+Staged version of glstring.batch.run, so that reading, checking and
+writing overlap instead of taking turns.
+
+    read   thread     reads and decodes Records into batches
+    check  processes  guards and checks each batch (see glstring.batch)
+    write  thread     writes results, counts stats, writes checkpoints
+
+The stages are connected by bounded queues, and at most two batches per
+worker process are being checked at once, so a slow stage holds back the
+ones before it and memory stays flat. Parsing is part of the check stage,
+since the checks tokenize each GL String themselves, and handing parsed
+GL Strings between processes would cost more than it saves.
+
+For each stage, the number of records it handled, the time it was busy,
+its throughput while busy, and the mean and maximum depth of the queue
+feeding it are reported, to show which stage is the bottleneck.
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import Record
+from .batch import check_violations
+from .batch import new_stats
+from .batch import write_result
+from .batch import write_run_checkpoint
+from .check import check_many
+from .guards import guarded
+
+
+_DONE = object()
+
+
+class StageStats:
+    """
+    records handled, busy time, and depth of the input queue of a stage
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.records = 0
+        self.busy = 0.0
+        self.depth_total = 0
+        self.depth_max = 0
+        self.depth_samples = 0
+
+    def __repr__(self):
+        return "StageStats('{}', {} records)".format(self.name, self.records)
+
+    def add(self, records, seconds):
+        self.records += records
+        self.busy += seconds
+
+    def sample(self, depth):
+        self.depth_total += depth
+        self.depth_samples += 1
+        self.depth_max = max(self.depth_max, depth)
+
+    def report(self):
+        """
+        Returns a dict of the stage's counts, throughput (records per busy
+        second) and mean and maximum input queue depth
+        """
+        return {
+            'records': self.records,
+            'busy': round(self.busy, 3),
+            'throughput': (round(self.records / self.busy, 1)
+                           if self.busy else None),
+            'queue_mean': (round(self.depth_total / self.depth_samples, 2)
+                           if self.depth_samples else 0),
+            'queue_max': self.depth_max,
+        }
+
+
+def _check_batch(batch, limits):
+    """
+    check stage: takes a list of Records and the guard limits, and returns
+    a tuple of a list of (Record without its GL String, result) tuples, and
+    the time taken
+    """
+    start = time.perf_counter()
+    checker = guarded(check_violations, *limits)
+    checked = [(Record(record.number, record.id, None, record.end), result)
+               for record, result in check_many(
+                   ((record, record.glstring) for record in batch),
+                   checker=checker)]
+    return checked, time.perf_counter() - start
+
+
+class _Stage(threading.Thread):
+    """
+    thread that runs target, and keeps any exception it raises. If it
+    fails, the thread keeps taking items from drain (if given) until _DONE,
+    so that the stage feeding it is not blocked forever.
+    """
+
+    def __init__(self, target, drain=None):
+        super().__init__(daemon=True)
+        self._target_function = target
+        self._drain = drain
+        self.error = None
+
+    def run(self):
+        try:
+            self._target_function()
+        except BaseException as error:
+            self.error = error
+            if self._drain is not None:
+                while self._drain.get() is not _DONE:
+                    pass
+
+
+def run(records, out, quarantine=None, stats=None, max_length=None,
+        max_tokens=None, max_genotypes=None, seconds=None, checkpoint=None,
+        checkpoint_every=10000, workers=None, batch_size=1000,
+        queue_size=4, stages=None, summary=None, progress=None):
+    """
+    Takes the same arguments as glstring.batch.run, and the number of
+    worker processes (default: one per CPU), records per batch, and batches
+    per queue, and checks and writes the records in stages. Summary and
+    progress, if given, are updated by the write stage, with the busy time
+    of the check stage as progress's busy time. If stages is a dict, a
+    report (see StageStats.report) for each stage is put in it. Returns
+    stats.
+    """
+    stats = new_stats(stats)
+    if progress is not None:
+        progress.workers = workers or os.cpu_count() or 1
+    limits = (max_length, max_tokens, max_genotypes, seconds)
+    stage_stats = {name: StageStats(name)
+                   for name in ('read', 'check', 'write')}
+    check_queue = queue.Queue(queue_size)
+    write_queue = queue.Queue(queue_size)
+
+    def read():
+        try:
+            iterator = iter(records)
+            while True:
+                start = time.perf_counter()
+                batch = list(itertools.islice(iterator, batch_size))
+                stage_stats['read'].add(len(batch),
+                                        time.perf_counter() - start)
+                if not batch:
+                    break
+                stage_stats['check'].sample(check_queue.qsize())
+                check_queue.put(batch)
+        finally:
+            check_queue.put(_DONE)
+
+    def write():
+        written = 0
+        record = None
+        while True:
+            checked = write_queue.get()
+            if checked is _DONE:
+                break
+            start = time.perf_counter()
+            for record, result in checked:
+                write_result(record, result, out, quarantine, stats,
+                             summary)
+                written += 1
+                if progress is not None:
+                    progress.busy = stage_stats['check'].busy
+                    progress.update(record, stats)
+                if checkpoint and written % checkpoint_every == 0:
+                    write_run_checkpoint(checkpoint, record, stats, out,
+                                         quarantine, summary)
+            stage_stats['write'].add(len(checked),
+                                     time.perf_counter() - start)
+        if checkpoint and record is not None:
+            write_run_checkpoint(checkpoint, record, stats, out, quarantine,
+                                 summary)
+        if progress is not None:
+            progress.report()
+
+    reader = _Stage(read)
+    writer = _Stage(write, drain=write_queue)
+    reader.start()
+    writer.start()
+    batch = None
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            in_flight = deque()
+            max_in_flight = 2 * (workers or os.cpu_count() or 1)
+            while True:
+                batch = check_queue.get()
+                if batch is _DONE:
+                    break
+                in_flight.append(executor.submit(_check_batch, batch,
+                                                 limits))
+                while len(in_flight) >= max_in_flight:
+                    _collect(in_flight.popleft(), stage_stats, write_queue)
+            while in_flight:
+                _collect(in_flight.popleft(), stage_stats, write_queue)
+    finally:
+        write_queue.put(_DONE)
+        writer.join()
+        # if checking failed, unblock the reader so that it can finish
+        while batch is not _DONE:
+            batch = check_queue.get()
+        reader.join()
+    for stage in (reader, writer):
+        if stage.error is not None:
+            raise stage.error
+    if stages is not None:
+        for name, stage in stage_stats.items():
+            stages[name] = stage.report()
+    return stats
+
+
+def _collect(future, stage_stats, write_queue):
+    """
+    waits for a checked batch, and passes it on to the write stage
+    """
+    checked, seconds = future.result()
+    stage_stats['check'].add(len(checked), seconds)
+    stage_stats['write'].sample(write_queue.qsize())
+    write_queue.put(checked)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+progress.py
+
+Progress reports of batch runs (see glstring.batch and glstring.pipeline).
+
+A Progress is told about each record written, and every so many seconds it
+reports the records and input bytes done so far, the rate in records per
+second since the last report and since the start, the time left (if the
+size of the input is known), how busy the checkers were, and the records
+with violations or quarantined so far. Each report is printed as a line to
+out (stderr by default), and written as JSON to path, if given, replacing
+the last one, so other tools can poll it.
+
+Between reports a record only costs a few additions and a clock read, so
+progress can be left on for production runs.
+"""
+
+import datetime
+import sys
+import time
+
+from .batch import write_checkpoint
+
+
+class Progress:
+    """
+    periodic progress reports of a batch run
+    """
+
+    def __init__(self, total_bytes=None, start_offset=0, every=10.0,
+                 out=sys.stderr, path=None, workers=1):
+        self.total_bytes = total_bytes
+        self.start_offset = start_offset
+        self.every = every
+        self.out = out
+        self.path = path
+        self.workers = workers
+        self.records = 0
+        self.bytes = 0
+        self.busy = 0.0
+        self.stats = {}
+        self.started = time.monotonic()
+        self._last_time = self.started
+        self._last_records = 0
+
+    def __repr__(self):
+        return 'Progress({} records)'.format(self.records)
+
+    def timed(self, checker):
+        """
+        Takes a checker, and returns it wrapped so that the time spent
+        checking is counted as busy time (for a single process run)
+        """
+        def timed_checker(glstring):
+            start = time.perf_counter()
+            try:
+                return checker(glstring)
+            finally:
+                self.busy += time.perf_counter() - start
+        return timed_checker
+
+    def update(self, record, stats):
+        """
+        Takes the last Record written and the stats of the run so far, and
+        reports progress if it is time to
+        """
+        self.records += 1
+        self.bytes = record.end - self.start_offset
+        self.stats = stats
+        if time.monotonic() - self._last_time >= self.every:
+            self.report()
+
+    def progress(self):
+        """
+        Returns the progress so far as a dict
+        """
+        now = time.monotonic()
+        elapsed = now - self.started
+        interval = now - self._last_time
+        average = self.records / elapsed if elapsed else 0.0
+        current = ((self.records - self._last_records) / interval
+                   if interval else average)
+        eta = None
+        if self.total_bytes and self.bytes and elapsed:
+            remaining = max(self.total_bytes - self.start_offset - self.bytes,
+                            0)
+            eta = remaining / (self.bytes / elapsed)
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'total_bytes': (self.total_bytes - self.start_offset
+                            if self.total_bytes else None),
+            'elapsed': round(elapsed, 1),
+            'rate': round(current, 1),
+            'average_rate': round(average, 1),
+            'eta': round(eta, 1) if eta is not None else None,
+            'utilization': (round(self.busy / (elapsed * self.workers), 3)
+                            if elapsed else None),
+            'warning': self.stats.get('warning', 0),
+            'quarantined': self.stats.get('quarantined', 0),
+        }
+
+    def report(self):
+        """
+        Reports the progress so far to out and path
+        """
+        progress = self.progress()
+        self._last_time = time.monotonic()
+        self._last_records = self.records
+        if self.out is not None:
+            parts = ['{} records'.format(progress['records']),
+                     '{:.1f} MB'.format(progress['bytes'] / 1e6)]
+            if progress['total_bytes']:
+                parts[-1] += ' ({:.0%})'.format(
+                    progress['bytes'] / progress['total_bytes'])
+            parts.append('{}/s now, {}/s avg'.format(
+                progress['rate'], progress['average_rate']))
+            if progress['eta'] is not None:
+                parts.append('ETA {}'.format(
+                    datetime.timedelta(seconds=round(progress['eta']))))
+            if progress['utilization'] is not None:
+                parts.append('checkers {:.0%} busy'.format(
+                    progress['utilization']))
+            parts.append('warning: {}, quarantined: {}'.format(
+                progress['warning'], progress['quarantined']))
+            print('progress:', ', '.join(parts), file=self.out, flush=True)
+        if self.path is not None:
+            write_checkpoint(self.path, progress)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+report.py
+
+Summary of the results of checking many GL Strings, counted as the
+results come in, so that a batch run can report what it found without
+printing a line for every item checked.
+
+A Summary counts the records checked, the records that were OK, had
+violations, or were quarantined, and the violations by check, by locus,
+and by pair of loci found together, as well as the alleles of the items
+with violations. The id of the first record seen is kept as an example
+for each of these. Summaries of the shards of a run can be merged, and
+saved and loaded as dicts (e.g. with a checkpoint or stats file).
+
+The report is built in memory and written with a single write, so it can
+be written periodically to a buffered file during a run, as well as at
+the end.
+"""
+
+import itertools
+import re
+from collections import Counter
+
+from .guards import Quarantined
+
+
+CATEGORIES = ('check', 'locus', 'locus_pair', 'allele')
+
+
+def _alleles(item):
+    """
+    returns the alleles of a checked item (a GL String or part of one)
+    """
+    if item is None:
+        return []
+    return [allele for allele in re.split(r'[\^|+~/]', item) if allele]
+
+
+class Summary:
+    """
+    counts of records and violations, with an example record id for each
+    check, locus, locus pair and allele
+    """
+
+    def __init__(self, out=None, every=None, top=10):
+        self.records = Counter()
+        self.counts = {category: Counter() for category in CATEGORIES}
+        self.examples = {category: {} for category in CATEGORIES}
+        self.out = out
+        self.every = every
+        self.top = top
+
+    def __repr__(self):
+        return 'Summary({} records)'.format(self.records['records'])
+
+    def _count(self, category, name, record_id):
+        self.counts[category][name] += 1
+        self.examples[category].setdefault(name, record_id)
+
+    def add(self, record_id, result):
+        """
+        Takes a record id and its result (a list of violations, see
+        glstring.check.get_violations, or Quarantined), and counts it. If
+        every is set, the report is written to out every that many records.
+        """
+        self.records['records'] += 1
+        if isinstance(result, Quarantined):
+            self.records['quarantined'] += 1
+        elif result:
+            self.records['warning'] += 1
+            for name, loci, item in result:
+                self._count('check', name, record_id)
+                for locus in loci:
+                    self._count('locus', locus, record_id)
+                for pair in itertools.combinations(sorted(loci), 2):
+                    self._count('locus_pair', '+'.join(pair), record_id)
+                for allele in _alleles(item):
+                    self._count('allele', allele, record_id)
+        else:
+            self.records['ok'] += 1
+        if self.every and self.records['records'] % self.every == 0:
+            self.write(self.out)
+
+    def merge(self, other):
+        """
+        Takes another Summary, and adds its counts to this one, keeping
+        this one's examples where both have one
+        """
+        self.records.update(other.records)
+        for category in CATEGORIES:
+            self.counts[category].update(other.counts[category])
+            for name, record_id in other.examples[category].items():
+                self.examples[category].setdefault(name, record_id)
+        return self
+
+    def to_dict(self):
+        """
+        Returns the counts and examples as a dict that can be saved as JSON
+        """
+        return {
+            'records': dict(self.records),
+            'counts': {category: dict(counts)
+                       for category, counts in self.counts.items()},
+            'examples': self.examples,
+        }
+
+    @classmethod
+    def from_dict(cls, d, out=None, every=None, top=10):
+        """
+        Takes a dict returned by to_dict, and returns the Summary
+        """
+        summary = cls(out, every, top)
+        summary.records.update(d['records'])
+        for category in CATEGORIES:
+            summary.counts[category].update(d['counts'][category])
+            summary.examples[category].update(d['examples'][category])
+        return summary
+
+    def report(self):
+        """
+        Returns the report as a str: the record counts, then the violations
+        by check, locus and locus pair, and the top alleles, each with the
+        number found and an example record id
+        """
+        records = self.records
+        lines = ['records: {}, ok: {}, warning: {}, quarantined: {}\n'.format(
+            records['records'], records['ok'], records['warning'],
+            records['quarantined'])]
+        for category in CATEGORIES:
+            counts = self.counts[category]
+            if not counts:
+                continue
+            top = self.top if category == 'allele' else None
+            lines.append('{}:\n'.format(category))
+            for name, count in counts.most_common(top):
+                lines.append('  {}\t{}\te.g. {}\n'.format(
+                    name, count, self.examples[category][name]))
+        return ''.join(lines)
+
+    def write(self, out):
+        """
+        Takes a file, and writes the report to it
+        """
+        out.write(self.report())
+        out.flush()
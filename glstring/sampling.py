@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+sampling.py
+
+Quick estimates of how many records of a feed have violations, from a
+sample of its records rather than a full run.
+
+Records are sampled uniformly in one pass with reservoir sampling, either
+from the whole input, or separately within strata (e.g. records with the
+same number of locus blocks). Only the sampled records are checked, and
+for any violation, each check, and each locus, the rate of records with
+such a violation is estimated for the whole input, with a 95% Wilson
+score interval. For a stratified sample, the stratum rates are weighted by
+stratum size, and the interval uses the effective sample size.
+"""
+
+import math
+import random
+from collections import Counter
+
+from .batch import check_violations
+from .guards import Quarantined
+
+
+Z = 1.959964
+
+# the checks of glstring.check.check_all
+CHECKS = ('locus_blocks', 'genotype_lists', 'genotypes', 'allele_lists')
+
+
+def reservoir_sample(records, size, key=None, seed=None):
+    """
+    Takes an iterable of records, a sample size, and optionally a function
+    that returns the stratum of a record, and returns a tuple of a dict of
+    each stratum to a uniform sample of at most size of its records, and a
+    Counter of the number of records in each stratum. Without key, all
+    records are in stratum None.
+    """
+    rng = random.Random(seed)
+    samples = {}
+    population = Counter()
+    for record in records:
+        stratum = key(record) if key is not None else None
+        population[stratum] += 1
+        seen = population[stratum]
+        sample = samples.setdefault(stratum, [])
+        if seen <= size:
+            sample.append(record)
+        else:
+            i = rng.randrange(seen)
+            if i < size:
+                sample[i] = record
+    return samples, population
+
+
+def locus_blocks_stratum(record):
+    """
+    Takes a Record, and returns the number of locus blocks in its GL
+    String, as a cheap stratum
+    """
+    return record.glstring.count('^') + 1
+
+
+def wilson_interval(rate, n):
+    """
+    Takes an estimated rate and a (effective) sample size, and returns the
+    (low, high) 95% Wilson score interval
+    """
+    if n <= 0:
+        return 0.0, 1.0
+    centre = (rate + Z * Z / (2 * n)) / (1 + Z * Z / n)
+    half = (Z / (1 + Z * Z / n)
+            * math.sqrt(rate * (1 - rate) / n + Z * Z / (4 * n * n)))
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def estimate(samples, population, checker=check_violations):
+    """
+    Takes the samples and population returned by reservoir_sample (of
+    Records), checks each sampled GL String with checker (which returns a
+    list of violations or Quarantined), and returns a list of (kind, name,
+    sampled records with a violation, estimated rate, low, high) tuples,
+    for kind 'any' (name 'violation' or 'quarantined'), 'check' and
+    'locus'. Any violation and each check are always included, so that a
+    clean sample still gives a rate of 0 and its upper bound.
+    """
+    total = sum(population.values())
+    sampled = sum(len(sample) for sample in samples.values())
+    counts = {('any', 'violation'): Counter()}
+    for check in CHECKS:
+        counts[('check', check)] = Counter()
+    for stratum, sample in samples.items():
+        for record in sample:
+            result = checker(record.glstring)
+            found = set()
+            if isinstance(result, Quarantined):
+                found.add(('any', 'quarantined'))
+            elif result:
+                found.add(('any', 'violation'))
+                for check, loci, item in result:
+                    found.add(('check', check))
+                    for locus in loci:
+                        found.add(('locus', locus))
+            for category in found:
+                counts.setdefault(category, Counter())[stratum] += 1
+
+    estimates = []
+    for (kind, name), by_stratum in sorted(counts.items()):
+        rate = variance = 0.0
+        for stratum, sample in samples.items():
+            weight = population[stratum] / total
+            n = len(sample)
+            if not n:
+                continue
+            p = by_stratum[stratum] / n
+            rate += weight * p
+            # finite population correction, since strata can be small
+            fpc = 1 - n / population[stratum]
+            if n > 1:
+                variance += weight * weight * fpc * p * (1 - p) / (n - 1)
+        if variance > 0:
+            effective = rate * (1 - rate) / variance
+        else:
+            effective = sampled
+        low, high = wilson_interval(rate, effective)
+        estimates.append((kind, name, sum(by_stratum.values()), rate, low,
+                          high))
+    return estimates
+
+
+def write_estimates(estimates, population, samples, out):
+    """
+    Takes the estimates, population and samples, and writes a tab separated
+    report of them to out
+    """
+    out.write('# records: {}, sampled: {}, strata: {}\n'.format(
+        sum(population.values()),
+        sum(len(sample) for sample in samples.values()), len(population)))
+    out.write('kind\tname\tsampled_with\trate\tlow_95\thigh_95\n')
+    for kind, name, count, rate, low, high in estimates:
+        out.write('{}\t{}\t{}\t{:.4f}\t{:.4f}\t{:.4f}\n'.format(
+            kind, name, count, rate, low, high))
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+stream.py
+
+Streaming tokenizer and checks for very long single GL Strings, read from
+a file object in chunks rather than held in memory as one str.
+
+tokenize() emits structural events as it reads:
+
+    ('block_start', n)   a locus block starts (numbered from 0)
+    ('allele', name)     an allele
+    ('delimiter', d)     the '/', '~' or '+' that follows an allele
+    ('genotype', text)   a genotype ends ('|' or '^' separated item)
+    ('block_end', n)     a locus block ends
+
+check_stream() consumes those events: the loci of allele lists, haplotype
+positions and genotypes are collected from the allele and delimiter
+events, and each is checked as it ends, rules as in glstring.check. It
+only ever holds one genotype at a time, along with the loci, and the locus
+sequences of the haplotypes (see glstring.check.haplotype_loci), seen so
+far. Of the items checked, only those with a WARNING are kept, and the
+rest are only counted, so memory does not grow with the length of the GL
+String.
+"""
+
+import codecs
+import re
+
+from .check import OPTIONAL_LOCI
+from .glstring import parse_allele
+
+
+_DELIMITER = re.compile(r'[/~+|^]')
+
+
+def tokenize(f, chunk_size=65536):
+    """
+    Takes a file object (text or binary, UTF-8) containing one GL String,
+    and yields its structural events (see the module docstring). A
+    trailing newline is ignored.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    block = 0
+    allele = ''
+    genotype = []
+    yield ('block_start', block)
+    while True:
+        raw = f.read(chunk_size)
+        if not raw:
+            break
+        # a chunk can end inside a multi-byte character, and decode to ''
+        chunk = decoder.decode(raw) if isinstance(raw, bytes) else raw
+        start = 0
+        for match in _DELIMITER.finditer(chunk):
+            delimiter = match.group()
+            allele += chunk[start:match.start()]
+            start = match.end()
+            yield ('allele', allele)
+            if delimiter in '|^':
+                genotype.append(allele)
+                yield ('genotype', ''.join(genotype))
+                genotype = []
+                if delimiter == '^':
+                    yield ('block_end', block)
+                    block += 1
+                    yield ('block_start', block)
+            else:
+                yield ('delimiter', delimiter)
+                genotype.append(allele + delimiter)
+            allele = ''
+        allele += chunk[start:]
+    allele += decoder.decode(b'', final=True)
+    allele = allele.rstrip('\r\n')
+    yield ('allele', allele)
+    genotype.append(allele)
+    yield ('genotype', ''.join(genotype))
+    yield ('block_end', block)
+
+
+class _Genotype:
+    """
+    loci of the allele list, haplotype position, haplotype and genotype
+    being read, collected from tokenize() events
+    """
+
+    def __init__(self):
+        self.allele_list = []
+        self.allele_list_loci = set()
+        self.position = set()
+        self.positions = []
+        self.loci = set()
+        self.haplotypes = set()
+        self.plus = False
+        self.phased = False
+
+    def allele(self, name):
+        locus = parse_allele(name).locus
+        self.allele_list.append(name)
+        self.allele_list_loci.add(locus)
+        self.position.add(locus)
+        self.loci.add(locus)
+
+    def end_allele_list(self, checked):
+        """
+        checks the allele list that just ended, if it has more than one
+        allele
+        """
+        if len(self.allele_list) > 1:
+            checked['counts']['allele_lists'] += 1
+            if len(self.allele_list_loci) > 1:
+                checked['allele_lists'].append(
+                    ('/'.join(self.allele_list), self.allele_list_loci,
+                     'WARNING'))
+        self.allele_list = []
+        self.allele_list_loci = set()
+
+    def end_position(self):
+        if not self.position <= OPTIONAL_LOCI:
+            self.positions.append(frozenset(self.position))
+        self.position = set()
+
+    def end_haplotype(self):
+        self.haplotypes.add(tuple(self.positions))
+        self.positions = []
+
+
+def check_stream(f, chunk_size=65536):
+    """
+    Takes a file object containing one GL String, and checks it as
+    glstring.check.check_all does, reading it in chunks. Returns a dict in
+    the same form, except that the lists of genotype lists, genotypes and
+    allele lists only hold the items with a WARNING (genotype lists are
+    identified by the number of their locus block, not by their text), and
+    'counts' holds the number of items checked for each of them.
+    """
+    checked = {
+        'locus_blocks': set(),
+        'genotype_lists': [],
+        'genotypes': [],
+        'allele_lists': [],
+        'counts': {'genotype_lists': 0, 'genotypes': 0, 'allele_lists': 0},
+    }
+    counts = checked['counts']
+    seen = set()
+    block_loci = set()
+    block_haplotypes = set()
+    genotype_count = 0
+    phased = False
+    current = _Genotype()
+    for event, value in tokenize(f, chunk_size):
+        if event == 'allele':
+            current.allele(value)
+        elif event == 'delimiter':
+            if value == '/':
+                continue
+            current.end_allele_list(checked)
+            current.end_position()
+            if value == '~':
+                current.phased = True
+            else:
+                current.end_haplotype()
+                current.plus = True
+        elif event == 'genotype':
+            current.end_allele_list(checked)
+            current.end_position()
+            current.end_haplotype()
+            if current.plus:
+                if len(current.loci) < 2:
+                    msg = 'OK'
+                elif not current.phased:
+                    msg = 'Unphased - WARNING'
+                elif len(current.haplotypes) == 1:
+                    msg = 'Phased - OK'
+                else:
+                    msg = 'Phased - WARNING'
+                counts['genotypes'] += 1
+                if 'WARNING' in msg:
+                    checked['genotypes'].append((value, current.loci, msg))
+            block_loci |= current.loci
+            block_haplotypes |= current.haplotypes
+            genotype_count += 1
+            phased = phased or current.phased
+            current = _Genotype()
+        elif event == 'block_start':
+            block_loci = set()
+            block_haplotypes = set()
+            genotype_count = 0
+            phased = False
+        elif event == 'block_end':
+            checked['locus_blocks'] |= seen & block_loci
+            seen |= block_loci
+            if genotype_count > 1:
+                if len(block_loci) > 1:
+                    if not phased:
+                        msg = 'WARNING'
+                    elif len(block_haplotypes) == 1:
+                        msg = 'Phased - OK'
+                    else:
+                        msg = 'Phased - WARNING'
+                else:
+                    msg = 'OK'
+                counts['genotype_lists'] += 1
+                if 'WARNING' in msg:
+                    checked['genotype_lists'].append((value, block_loci,
+                                                      msg))
+    return checked
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+vectorized.py
+
+Batch checks of many GL Strings at once with NumPy, which is an optional
+dependency of this module only.
+
+The GL Strings are dictionary encoded into shared flat arrays (see
+glstring.encoding), and each check is done for all of them with array
+operations over the tokens, rather than one GL String at a time. The flags
+returned agree with the WARNINGs of the functions in glstring.check.
+Phased items with more than one locus are the exception: their haplotypes
+are compared by glstring.check.haplotype_loci, one item at a time.
+"""
+
+from .check import haplotype_loci
+from .encoding import EncodedGlStrings
+from .encoding import LEVELS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _segments(delimiters, separators):
+    """
+    Takes the delimiter bytes of all tokens, and the separators of a level,
+    and returns the segment number of each token, and whether each token
+    ends its segment
+    """
+    ends = np.isin(delimiters, list((separators + '\0').encode()))
+    starts = np.empty_like(ends)
+    starts[:1] = True
+    starts[1:] = ends[:-1]
+    return np.cumsum(starts) - 1, ends
+
+
+def _count_distinct(groups, values, size):
+    """
+    Takes the group number and a value for each token, and returns the
+    number of distinct values in each of size groups, and the unique
+    (group, value) pairs as group * (max value + 1) + value
+    """
+    width = int(values.max()) + 1 if len(values) else 1
+    pairs = np.unique(groups * width + values)
+    return np.bincount(pairs // width, minlength=size), pairs, width
+
+
+def check_batch(glstrs):
+    """
+    Takes a sequence (or NumPy array) of GL Strings as str, and returns a
+    dict of NumPy bool arrays aligned with it, one for each check in
+    glstring.check: 'locus_blocks' (a locus is found in more than one locus
+    block), and 'genotype_lists', 'genotypes' and 'allele_lists' (an
+    unphased item at that level contains more than one locus, or a phased
+    one has haplotypes with different loci).
+    """
+    if np is None:
+        raise ImportError("check_batch requires numpy")
+    encoded = EncodedGlStrings().extend(glstrs)
+    size = len(encoded)
+    checked = {level: np.zeros(size, dtype=bool) for level in LEVELS}
+    if size == 0:
+        return checked
+
+    offsets = np.frombuffer(encoded.offsets, dtype=np.uint64).astype(np.int64)
+    ids = np.frombuffer(encoded.ids, dtype=np.uint32)
+    delimiters = np.frombuffer(bytes(encoded.structure), dtype=np.uint8)
+    allele_loci = np.frombuffer(encoded.dictionary.allele_loci,
+                                dtype=np.uint32).astype(np.int64)
+    loci = allele_loci[ids]
+    records = np.repeat(np.arange(size, dtype=np.int64), np.diff(offsets))
+
+    for level, (separators, required) in LEVELS.items():
+        segments, ends = _segments(delimiters, separators)
+        count = int(segments[-1]) + 1
+        segment_records = records[ends]
+        distinct, pairs, width = _count_distinct(segments, loci, count)
+        if level == 'locus_blocks':
+            # a locus is duplicated if it is found in more than one of the
+            # locus blocks of the same GL String
+            pair_records = segment_records[pairs // width]
+            keys = pair_records * width + pairs % width
+            keys, counts = np.unique(keys, return_counts=True)
+            duplicated = keys[counts > 1] // width
+            checked[level][duplicated] = True
+            continue
+        inside = ~ends
+        has_required = np.bincount(
+            segments, weights=inside & (delimiters == ord(required)),
+            minlength=count) > 0
+        phased = np.bincount(
+            segments, weights=inside & (delimiters == ord('~')),
+            minlength=count) > 0
+        flagged = has_required & ~phased & (distinct > 1)
+        checked[level][segment_records[flagged]] = True
+        candidates = np.flatnonzero(has_required & phased & (distinct > 1))
+        if len(candidates):
+            starts = np.searchsorted(segments, candidates, side='left')
+            stops = np.searchsorted(segments, candidates, side='right')
+            for segment, start, stop in zip(candidates, starts, stops):
+                item = _decode(encoded, ids, delimiters, start, stop)
+                if len(haplotype_loci(item)[1]) > 1:
+                    checked[level][segment_records[segment]] = True
+    return checked
+
+
+def _decode(encoded, ids, delimiters, start, stop):
+    """
+    returns the text of the tokens from start to stop (not included)
+    """
+    alleles = encoded.dictionary.alleles
+    return ''.join(alleles[ids[i]] + chr(delimiters[i])
+                   for i in range(start, stop))[:-1]
@@ -19,6 +19,10 @@ setup(
     author_email='bmilius@nmdp.org',
     url='https://github.com/nmdp-bioinformatics/pyglstring',
     license=license,
-    packages=find_packages(exclude=('tests', 'docs', 'bin'))
+    packages=find_packages(exclude=('tests', 'docs', 'bin')),
+    extras_require={
+        'numpy': ['numpy'],
+        'pandas': ['pandas'],
+    }
 )
 
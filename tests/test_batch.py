@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import tempfile
+import unittest
+
+from glstring import batch
+
+
+GLSTRINGS = [
+    'HLA-A*01:01+HLA-A*02:01^HLA-B*08:01+HLA-B*44:02',
+    'HLA-A*01:01+HLA-B*08:01',
+    'HLA-A*01:01/HLA-A*01:02+HLA-A*24:02',
+    'HLA-A*01:01~HLA-B*08:01+HLA-B*44:02~HLA-A*02:01',
+    'HLA-A*01:01+HLA-A*02:01^HLA-A*03:01+HLA-A*24:02',
+    'HLA-DRB1*03:01+HLA-DRB1*04:01|HLA-DRB1*03:01+HLA-DRB1*04:02'
+    '|HLA-DRB1*03:02+HLA-DRB1*04:01',
+]
+
+# quarantines the longest of GLSTRINGS
+MAX_LENGTH = 80
+
+
+def write_input(path, count=100):
+    """
+    writes count records (with a blank line and a record without an id)
+    to path
+    """
+    with open(path, 'w') as f:
+        for i in range(count):
+            if i == 10:
+                f.write('\n')
+            if i == 20:
+                f.write('{}\n'.format(GLSTRINGS[0]))
+                continue
+            f.write('subject{}\t{}\n'.format(i, GLSTRINGS[i % len(GLSTRINGS)]))
+
+
+def full_run(path):
+    """
+    checks the input at path in one run, and returns the results,
+    quarantine and stats
+    """
+    out, quarantine = io.StringIO(), io.StringIO()
+    with open(path, 'rb') as f:
+        stats = batch.run(batch.read_records(f), out, quarantine,
+                          max_length=MAX_LENGTH)
+    return out.getvalue(), quarantine.getvalue(), stats
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupted(records, after):
+    """
+    yields the first after records, then raises Interrupted
+    """
+    for i, record in enumerate(records):
+        if i == after:
+            raise Interrupted()
+        yield record
+
+
+class BatchTestSuite(unittest.TestCase):
+    """Resumed and sharded runs write the same results as a full run."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input = os.path.join(self.tmp.name, 'records.txt')
+        write_input(self.input)
+        self.expected = full_run(self.input)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_full_run(self):
+        results, quarantine, stats = self.expected
+        self.assertEqual(stats['records'], 100)
+        self.assertEqual(stats['quarantined'], 16)
+        self.assertEqual(len(results.splitlines()), 84)
+        self.assertEqual(len(quarantine.splitlines()), 16)
+        # the record without an id is named by its line number
+        self.assertIn('\n21\t21\tOK\t\n', results)
+
+    def test_resume(self):
+        checkpoint = self.path('checkpoint.json')
+        output, quarantined = self.path('out.txt'), self.path('q.txt')
+        # interrupted after 37 records, with a checkpoint every 10, so the
+        # outputs hold records written after the last checkpoint
+        with open(self.input, 'rb') as f, \
+                open(output, 'w') as out, open(quarantined, 'w') as q:
+            with self.assertRaises(Interrupted):
+                batch.run(interrupted(batch.read_records(f), 37), out, q,
+                          max_length=MAX_LENGTH, checkpoint=checkpoint,
+                          checkpoint_every=10)
+        saved = batch.read_checkpoint(checkpoint)
+        self.assertEqual(saved['stats']['records'], 30)
+
+        with open(self.input, 'rb') as f, \
+                open(output, 'r+') as out, open(quarantined, 'r+') as q:
+            out.truncate(saved['output_offset'])
+            out.seek(0, os.SEEK_END)
+            q.truncate(saved['quarantine_offset'])
+            q.seek(0, os.SEEK_END)
+            stats = batch.run(
+                batch.read_records(f, saved['input_offset'],
+                                   number=saved['line'] + 1),
+                out, q, saved['stats'], max_length=MAX_LENGTH,
+                checkpoint=checkpoint, checkpoint_every=10)
+        results, quarantine, expected_stats = self.expected
+        with open(output) as out, open(quarantined) as q:
+            self.assertEqual(out.read(), results)
+            self.assertEqual(q.read(), quarantine)
+        self.assertEqual(stats, expected_stats)
+
+    def test_read_records_number(self):
+        with open(self.input, 'rb') as f:
+            records = list(batch.read_records(f))
+            for record in records[:30]:
+                counted = list(batch.read_records(f, record.end))
+                given = list(batch.read_records(f, record.end,
+                                                number=record.number + 1))
+                self.assertEqual(given, counted)
+
+    def check_shards(self, shards, by):
+        outputs, quarantines, stats_list = [], [], []
+        for shard in range(shards):
+            out, quarantine = io.StringIO(), io.StringIO()
+            with open(self.input, 'rb') as f:
+                if by == 'range':
+                    start, end = batch.shard_range(f, shard, shards)
+                    records = batch.read_records(f, start, end)
+                else:
+                    records = batch.shard_by_hash(batch.read_records(f),
+                                                  shard, shards)
+                stats_list.append(batch.run(records, out, quarantine,
+                                            max_length=MAX_LENGTH))
+            outputs.append(io.StringIO(out.getvalue()))
+            quarantines.append(io.StringIO(quarantine.getvalue()))
+        merged, merged_quarantine = io.StringIO(), io.StringIO()
+        batch.merge_results(outputs, merged)
+        batch.merge_results(quarantines, merged_quarantine)
+        results, quarantine, stats = self.expected
+        self.assertEqual(merged.getvalue(), results)
+        self.assertEqual(merged_quarantine.getvalue(), quarantine)
+        self.assertEqual(batch.merge_stats(stats_list), stats)
+
+    def test_shard_by_hash(self):
+        for shards in (1, 3, 7):
+            with self.subTest(shards=shards):
+                self.check_shards(shards, 'hash')
+
+    def test_shard_by_range(self):
+        for shards in (1, 3, 7, 150):
+            with self.subTest(shards=shards):
+                self.check_shards(shards, 'range')
+
+
+if __name__ == '__main__':
+    unittest.main()
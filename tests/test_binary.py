@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import os
+import tempfile
+import unittest
+
+from glstring.binary import BinaryReader
+from glstring.binary import write_binary
+from glstring.glstring import parse
+
+
+GLSTRINGS = [
+    'HLA-A*01:01',
+    'HLA-A*01:01/HLA-A*01:02+HLA-A*24:02^HLA-B*08:01+HLA-B*44:02',
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02'
+    '|HLA-A*03:01~HLA-B*07:02+HLA-A*24:02~HLA-B*35:01',
+    'HLA-DRB1*03:01/HLA-DRB1*03:02~HLA-DRB3*01:01+HLA-DRB1*04:01~HLA-DRB4*'
+    '01:01^HLA-DQB1*02:01+HLA-DQB1*03:02',
+    'HLA-A*01:01',
+]
+
+
+class BinaryTestSuite(unittest.TestCase):
+    """GL Strings read back from a binary file are the ones written."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'glstrings.bin')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        write_binary(GLSTRINGS, self.path)
+        reader = BinaryReader(self.path)
+        self.assertEqual(len(reader), len(GLSTRINGS))
+        self.assertEqual(list(reader), GLSTRINGS)
+        for i, glstr in enumerate(GLSTRINGS):
+            self.assertEqual(reader.parsed(i), parse(glstr))
+
+    def test_empty(self):
+        write_binary([], self.path)
+        self.assertEqual(list(BinaryReader(self.path)), [])
+
+    def test_large_dictionary(self):
+        # more alleles than fit in 16 bit ids
+        glstrs = ['HLA-A*{:05d}+HLA-A*{:05d}'.format(i, i + 1)
+                  for i in range(0, 70000, 2)]
+        write_binary(glstrs, self.path)
+        reader = BinaryReader(self.path)
+        self.assertEqual(len(reader.alleles), 70000)
+        self.assertEqual(list(reader), glstrs)
+
+    def test_not_binary(self):
+        for data in (b'HLA-A*01:01' * 10, b'GLSB', b''):
+            with open(self.path, 'wb') as f:
+                f.write(data)
+            with self.assertRaises(ValueError):
+                BinaryReader(self.path)
+
+    def test_close(self):
+        write_binary(GLSTRINGS, self.path)
+        with BinaryReader(self.path) as reader:
+            self.assertEqual(reader[1], GLSTRINGS[1])
+        with self.assertRaises(ValueError):
+            reader[1]
+        reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
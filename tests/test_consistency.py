@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+from collections import Counter
+
+from glstring.batch import Record
+from glstring.batch import read_records
+from glstring.consistency import check_subject
+from glstring.consistency import check_subjects
+from glstring.consistency import overlap
+
+
+INPUT = """\
+s1\tHLA-A*01:01+HLA-A*02:01^HLA-B*08:01+HLA-B*44:02
+s2\tHLA-A*03:01+HLA-A*24:02
+s1\tHLA-A*01:01:01:01+HLA-A*11:01^HLA-B*07:02+HLA-B*35:01
+s3\tHLA-A*01:01+HLA-A*02:01
+s2\tHLA-A*03:01/HLA-A*03:02+HLA-A*68:01
+s3\tHLA-C*07:01+HLA-C*07:02
+s1\tHLA-A*01+HLA-A*02^HLA-B*08:01+HLA-B*44:02
+"""
+
+# s1 lines 0 and 2 have no HLA-B allele in common, nor lines 2 and 6
+CONFLICTS = ['s1\tHLA-B\t0\t2\n', 's1\tHLA-B\t2\t6\n']
+
+
+def records(text):
+    return read_records(io.BytesIO(text.encode()))
+
+
+class ConsistencyTestSuite(unittest.TestCase):
+    """The records of a subject have an allele in common at each locus."""
+
+    def test_overlap(self):
+        self.assertTrue(overlap({('01', '01')}, {('01', '01', '01', '01')}))
+        self.assertTrue(overlap({('01',)}, {('01', '01')}))
+        self.assertTrue(overlap({()}, {('02', '01')}))
+        self.assertFalse(overlap({('01', '01')}, {('01', '02')}))
+        self.assertFalse(overlap({('01', '01')}, {('11', '01')}))
+        self.assertFalse(overlap(set(), {('01', '01')}))
+
+    def test_check_subject(self):
+        subject = [Record(0, 's', 'HLA-A*01:01+HLA-A*02:01', None),
+                   Record(1, 's', 'HLA-A*03:01+HLA-A*24:02^HLA-B*08:01',
+                          None)]
+        self.assertEqual(check_subject(subject), [('HLA-A', 0, 1)])
+        self.assertEqual(check_subject(subject[:1]), [])
+
+    def check(self, text, **options):
+        out = io.StringIO()
+        stats = check_subjects(records(text), out, **options)
+        return sorted(out.getvalue().splitlines(keepends=True)), stats
+
+    def test_hashed(self):
+        lines, stats = self.check(INPUT)
+        self.assertEqual(lines, CONFLICTS)
+        self.assertEqual(stats, {'records': 7, 'subjects': 3,
+                                 'compared': 3, 'inconsistent': 1,
+                                 'conflicts': Counter({'HLA-B': 2})})
+
+    def test_spilled(self):
+        self.assertEqual(self.check(INPUT, max_records=2, partitions=3),
+                         self.check(INPUT))
+
+    def test_sorted(self):
+        text = ''.join(sorted(INPUT.splitlines(keepends=True)))
+        lines, stats = self.check(text, presorted=True)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(stats['inconsistent'], 1)
+        with self.assertRaises(ValueError):
+            self.check(INPUT, presorted=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
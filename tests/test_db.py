@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import sqlite3
+import unittest
+
+from glstring import db
+
+
+ROWS = [
+    ('d1', 'HLA-A*01:01+HLA-A*02:01^HLA-B*08:01+HLA-B*44:02'),
+    ('d2', 'HLA-A*01:01+HLA-B*08:01'),
+    ('d3', 'HLA-A*01:01/HLA-A*01:02+HLA-A*24:02'),
+    ('d4', None),
+    ('d5', 'HLA-A*01:01+HLA-A*02:01^HLA-A*03:01+HLA-A*24:02'),
+]
+
+
+class DbTestSuite(unittest.TestCase):
+    """Results are written back, and unchanged rows are skipped."""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE typings (donor TEXT, gl TEXT)')
+        self.conn.executemany('INSERT INTO typings VALUES (?, ?)', ROWS)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def check(self, **options):
+        return db.check_table(self.conn, 'typings', 'donor', 'gl',
+                              page_size=2, **options)
+
+    def results(self):
+        return {row[0]: row[1:] for row in self.conn.execute(
+            'SELECT donor, gl_status, gl_violations FROM typings')}
+
+    def test_results(self):
+        stats = self.check()
+        self.assertEqual(stats, {'records': 4, 'unchanged': 0, 'ok': 2,
+                                 'warning': 2, 'quarantined': 0})
+        self.assertEqual(self.results(), {
+            'd1': ('OK', ''),
+            'd2': ('WARNING', 'genotypes=HLA-A,HLA-B'),
+            'd3': ('OK', ''),
+            'd4': (None, None),
+            'd5': ('WARNING', 'locus_blocks=HLA-A'),
+        })
+
+    def test_second_run_skips_unchanged(self):
+        self.check()
+        stats = self.check()
+        self.assertEqual(stats['records'], 4)
+        self.assertEqual(stats['unchanged'], 4)
+        self.assertEqual(stats['ok'] + stats['warning'], 0)
+
+    def test_changed_row_is_checked(self):
+        self.check()
+        self.conn.execute("UPDATE typings SET gl = ? WHERE donor = 'd2'",
+                          ('HLA-A*01:01+HLA-A*02:01',))
+        stats = self.check()
+        self.assertEqual(stats['unchanged'], 3)
+        self.assertEqual(stats['ok'], 1)
+        self.assertEqual(self.results()['d2'], ('OK', ''))
+
+    def test_force(self):
+        self.check()
+        stats = self.check(force=True)
+        self.assertEqual(stats['unchanged'], 0)
+        self.assertEqual(stats['ok'] + stats['warning'], 4)
+
+    def test_quarantine(self):
+        stats = self.check(max_length=40)
+        self.assertEqual(stats['quarantined'], 2)
+        self.assertEqual(self.results()['d1'][0], 'QUARANTINED')
+
+    def test_id_index(self):
+        self.check()
+        indexes = [row[1] for row in
+                   self.conn.execute('PRAGMA index_list(typings)')]
+        self.assertEqual(indexes, ['gl_typings_donor'])
+        # an id that is already indexed does not get a second index
+        self.conn.execute('CREATE TABLE keyed (id INTEGER PRIMARY KEY, '
+                          'glstring TEXT)')
+        db.check_table(self.conn, 'keyed')
+        self.assertEqual(
+            self.conn.execute('PRAGMA index_list(keyed)').fetchall(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
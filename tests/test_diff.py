@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+
+from glstring.diff import diff_results
+
+
+OLD = """\
+0\ts0\tWARNING\tgenotypes=HLA-A,HLA-B
+1\ts0\tOK\t
+2\ts1\tWARNING\tlocus_blocks=HLA-A
+3\ts2\tOK\t
+4\ts3\tWARNING\tgenotypes=HLA-A,HLA-B
+5\ts4\tOK\t
+"""
+
+NEW = """\
+1\ts0\tOK\t
+2\ts1\tOK\t
+3\ts2\tWARNING\tallele_lists=HLA-A,HLA-C
+4\ts3\tWARNING\tgenotypes=HLA-A,HLA-C
+5\ts4\tOK\t
+6\ts5\tOK\t
+"""
+
+
+def diff(old, new, chunk_lines=1000000):
+    out = io.StringIO()
+    counts = diff_results(io.StringIO(old), io.StringIO(new), out,
+                          chunk_lines)
+    return out.getvalue().splitlines(), counts
+
+
+class DiffTestSuite(unittest.TestCase):
+    """Records are matched by id and line number."""
+
+    def test_diff(self):
+        lines, counts = diff(OLD, NEW)
+        self.assertEqual(lines, [
+            's0\t0\tonly_old\tgenotypes=HLA-A,HLA-B\t',
+            's1\t2\tfixed\tlocus_blocks=HLA-A\t',
+            's2\t3\tnew\t\tallele_lists=HLA-A,HLA-C',
+            's3\t4\tchanged\tgenotypes=HLA-A,HLA-B\tgenotypes=HLA-A,HLA-C',
+            's5\t6\tonly_new\t\t',
+        ])
+        self.assertEqual(
+            {kind: counts[kind] for kind in
+             ('new', 'fixed', 'changed', 'only_old', 'only_new')},
+            {'new': 1, 'fixed': 1, 'changed': 1, 'only_old': 1,
+             'only_new': 1})
+        self.assertEqual(counts['added']['by_check'],
+                         {'allele_lists': 1, 'genotypes': 1})
+        self.assertEqual(counts['removed']['by_locus'],
+                         {'HLA-A': 2, 'HLA-B': 1})
+
+    def test_repeated_id(self):
+        # the record of s0 on line 0 is quarantined in the new run, so it
+        # is not fixed, and the one on line 1 is unchanged
+        lines, counts = diff(OLD, NEW)
+        self.assertEqual([line for line in lines if line.startswith('s0')],
+                         ['s0\t0\tonly_old\tgenotypes=HLA-A,HLA-B\t'])
+        self.assertEqual(counts['fixed'], 1)
+
+    def test_line_numbers_sort_as_numbers(self):
+        old = '9\ts0\tOK\t\n10\ts0\tWARNING\tgenotypes=HLA-A,HLA-B\n'
+        new = '9\ts0\tOK\t\n10\ts0\tOK\t\n'
+        lines, counts = diff(old, new)
+        self.assertEqual(lines,
+                         ['s0\t10\tfixed\tgenotypes=HLA-A,HLA-B\t'])
+
+    def test_external_sort(self):
+        self.assertEqual(diff(OLD, NEW, chunk_lines=2), diff(OLD, NEW))
+
+    def test_same(self):
+        lines, counts = diff(OLD, OLD)
+        self.assertEqual(lines, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import unittest
+
+from glstring.glstring import count_genotypes
+from glstring.glstring import expand_genotypes
+
+
+class GenotypesTestSuite(unittest.TestCase):
+    """Genotypes are counted and expanded with unordered sides."""
+
+    def test_count(self):
+        self.assertEqual(count_genotypes('HLA-A*01:01'), ([1], 1))
+        self.assertEqual(
+            count_genotypes('HLA-A*01:01/HLA-A*01:02+HLA-A*24:02'
+                            '^HLA-B*08:01+HLA-B*44:02/HLA-B*44:03'),
+            ([2, 2], 4))
+
+    def test_count_unordered(self):
+        # 3 x 3 ordered pairs, of which the 3 pairs of different alleles
+        # are each counted twice
+        self.assertEqual(
+            count_genotypes('A*1/A*2/A*3+A*1/A*2/A*3'), ([6], 6))
+        # 2 x 2 ordered pairs, sharing A*2 only
+        self.assertEqual(count_genotypes('A*1/A*2+A*2/A*3'), ([4], 4))
+        # A*1~B*1+A*2~B*2 and A*2~B*2+A*1~B*1 are the same
+        self.assertEqual(count_genotypes('A*1/A*2~B*1/B*2+A*1/A*2~B*1/B*2'),
+                         ([10], 10))
+
+    def test_count_repeated_alleles(self):
+        self.assertEqual(count_genotypes('A*1/A*1+A*2'), ([1], 1))
+
+    def test_count_genotype_list(self):
+        # summed over the genotypes of a list, so shared genotypes are
+        # counted once for each genotype that implies them
+        self.assertEqual(count_genotypes('A*1+A*2|A*2+A*3'), ([2], 2))
+        self.assertEqual(count_genotypes('A*1/A*2+A*3|A*3+A*1'), ([3], 3))
+
+    def test_expand(self):
+        self.assertEqual(
+            list(expand_genotypes('A*1/A*2+A*3^B*1+B*2/B*3')),
+            ['A*1+A*3^B*1+B*2', 'A*1+A*3^B*1+B*3',
+             'A*2+A*3^B*1+B*2', 'A*2+A*3^B*1+B*3'])
+
+    def test_expand_unordered(self):
+        self.assertEqual(list(expand_genotypes('A*1/A*2+A*1/A*2')),
+                         ['A*1+A*1', 'A*1+A*2', 'A*2+A*2'])
+        self.assertEqual(list(expand_genotypes('A*2+A*1')), ['A*1+A*2'])
+
+    def test_expand_genotype_list(self):
+        self.assertEqual(
+            list(expand_genotypes('HLA-A*01:01/HLA-A*01:02+HLA-A*03:01'
+                                  '|HLA-A*03:01+HLA-A*01:01')),
+            ['HLA-A*01:01+HLA-A*03:01', 'HLA-A*01:02+HLA-A*03:01'])
+
+    def test_count_matches_expansion(self):
+        alleles = ['A*1', 'A*2', 'A*3']
+        lists = ['/'.join(combination) for size in (1, 2, 3)
+                 for combination in itertools.combinations(alleles, size)]
+        for first, second in itertools.product(lists, repeat=2):
+            for glstr in (first + '+' + second,
+                          first + '~B*1+' + second + '~B*1/B*2'):
+                with self.subTest(glstr=glstr):
+                    expanded = list(expand_genotypes(glstr))
+                    self.assertEqual(len(expanded), len(set(expanded)))
+                    self.assertEqual(count_genotypes(glstr)[1],
+                                     len(expanded))
+
+    def test_limit(self):
+        glstr = '^'.join('L{0}*1/L{0}*2+L{0}*3/L{0}*4'.format(i)
+                         for i in range(40))
+        self.assertEqual(count_genotypes(glstr)[1], 4 ** 40)
+        self.assertEqual(len(list(expand_genotypes(glstr, limit=5))), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import builtins
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from glstring.mac import MacTable
+from glstring.mac import load_macs
+
+
+# the layout of NMDP alpha.v3.txt
+ALPHA = """\
+*\tCODE\tSUBTYPE
+
+\tAB\t01/02
+*\tAC\t01/03
+\tXY\t01:01/02:01
+"""
+
+
+class MacTestSuite(unittest.TestCase):
+    """Multiple allele codes are expanded into allele lists."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'alpha.v3.txt')
+        with open(self.path, 'w') as f:
+            f.write(ALPHA)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read(self):
+        table = load_macs(self.path, cache=False)
+        self.assertEqual(table.codes, {'AB': '01/02', 'AC': '01/03',
+                                       'XY': '01:01/02:01'})
+
+    def test_expand(self):
+        table = MacTable({'AB': '01/02', 'XY': '01:01/02:01'})
+        self.assertEqual(table.expand_allele('HLA-A*01:AB'),
+                         'HLA-A*01:01/HLA-A*01:02')
+        self.assertEqual(table.expand_allele('HLA-B*07:XY'),
+                         'HLA-B*01:01/HLA-B*02:01')
+        for allele in ('HLA-A*01:01', 'HLA-A*01:ZZ', 'HLA-A*01:AB:01',
+                       'HLA-A'):
+            self.assertEqual(table.expand_allele(allele), allele)
+        self.assertEqual(
+            table.expand('HLA-A*01:AB+HLA-A*24:02^HLA-B*07:XY~HLA-C*07:AB'),
+            'HLA-A*01:01/HLA-A*01:02+HLA-A*24:02'
+            '^HLA-B*01:01/HLA-B*02:01~HLA-C*07:01/HLA-C*07:02')
+
+    def test_cache(self):
+        first = load_macs(self.path)
+        with open(self.path + '.cache') as f:
+            self.assertEqual(json.load(f), first.codes)
+        self.assertEqual(load_macs(self.path).codes, first.codes)
+
+    def test_read_only(self):
+        real_open = builtins.open
+
+        def read_only_open(path, *args, **kwargs):
+            if str(path).endswith('.tmp'):
+                raise PermissionError(path)
+            return real_open(path, *args, **kwargs)
+
+        with mock.patch('builtins.open', read_only_open):
+            table = load_macs(self.path)
+        self.assertEqual(len(table), 3)
+        self.assertFalse(os.path.exists(self.path + '.cache'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import builtins
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from glstring import check
+from glstring.nomenclature import Nomenclature
+from glstring.nomenclature import load_nomenclature
+from glstring.nomenclature import read_cache
+
+
+ALLELE_LIST = """\
+# file: Allelelist.txt
+AlleleID,Allele
+HLA00001,A*01:01:01:01
+HLA00002,A*01:01:01:02N
+HLA00005,A*02:01:01:01
+HLA00132,B*08:01:01:01
+HLA12345,A*11:01
+"""
+
+
+class NomenclatureTestSuite(unittest.TestCase):
+    """Allele names are looked up in full or truncated."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'Allelelist.txt')
+        with open(self.path, 'w') as f:
+            f.write(ALLELE_LIST)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lookup(self):
+        nomenclature = load_nomenclature(self.path, cache=False)
+        self.assertEqual(len(nomenclature), 5)
+        for allele in ('HLA-A*01:01:01:01', 'HLA-A*01:01:01:02N',
+                       'HLA-A*01:01', 'HLA-A*01', 'HLA-A*11:01'):
+            self.assertIn(allele, nomenclature)
+        # a truncated name only matches at a field boundary
+        for allele in ('HLA-A*01:0', 'HLA-A*01:01:01:0', 'HLA-A*03:01',
+                       'HLA-A*11:01:01', 'A*01:01', 'HLA-Z*99:99'):
+            self.assertNotIn(allele, nomenclature)
+
+    def test_cache(self):
+        first = load_nomenclature(self.path)
+        self.assertTrue(os.path.exists(self.path + '.cache'))
+        second = load_nomenclature(self.path)
+        self.assertEqual(list(first.names), list(second.names))
+        self.assertIn('HLA-B*08:01', second)
+
+    def test_cache_prefix(self):
+        load_nomenclature(self.path)
+        cache_path = self.path + '.cache'
+        self.assertIsNone(read_cache(cache_path, 'HLA-A-LONGER-PREFIX-'))
+        # a prefix longer than a fixed width field is stored in full
+        prefix = 'EXAMPLE-LONG-PREFIX-'
+        nomenclature = load_nomenclature(self.path, prefix)
+        self.assertIn(prefix + 'A*01:01', nomenclature)
+        self.assertIsNone(read_cache(cache_path, prefix[:16]))
+
+    def test_read_only(self):
+        real_open = builtins.open
+
+        def read_only_open(path, *args, **kwargs):
+            if str(path).endswith('.tmp'):
+                raise PermissionError(path)
+            return real_open(path, *args, **kwargs)
+
+        with mock.patch('builtins.open', read_only_open):
+            nomenclature = load_nomenclature(self.path)
+        self.assertIn('HLA-A*01:01', nomenclature)
+        self.assertFalse(os.path.exists(self.path + '.cache'))
+
+    def test_alleles_check(self):
+        nomenclature = Nomenclature(['HLA-A*01:01:01:01', 'HLA-A*02:01'])
+        self.assertEqual(
+            check.alleles('HLA-A*01:01+HLA-A*02:02', nomenclature),
+            [('HLA-A*01:01', {'HLA-A'}, 'OK'),
+             ('HLA-A*02:02', {'HLA-A'}, 'WARNING')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+
+from glstring import check
+from glstring.encoding import EncodedGlStrings
+from glstring.stream import check_stream
+from glstring.vectorized import check_batch
+from glstring.vectorized import np
+
+
+CHECKS = ('locus_blocks', 'genotype_lists', 'genotypes', 'allele_lists')
+
+GLSTRINGS = [
+    # phased, same loci on both haplotypes
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02',
+    # phased, loci in a different order on the haplotypes
+    'HLA-A*01:01~HLA-B*08:01+HLA-B*44:02~HLA-A*02:01',
+    # phased, a locus missing from one haplotype
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01',
+    # phased genotype list, all OK
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02'
+    '|HLA-A*03:01~HLA-B*07:02+HLA-A*24:02~HLA-B*35:01',
+    # phased genotype list, the second genotype has other loci
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02'
+    '|HLA-A*03:01~HLA-C*07:02+HLA-A*24:02~HLA-C*04:01',
+    # phased with allele lists, OK
+    'HLA-A*01:01/HLA-A*01:02~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02/HLA-B*44:03',
+    # phased with an allele list of two loci
+    'HLA-A*01:01/HLA-B*07:02~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02',
+    # phased locus block followed by a block of a locus already seen
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02'
+    '^HLA-B*07:02+HLA-B*35:01',
+    # phased and unphased genotypes in one genotype list
+    'HLA-A*01:01~HLA-B*08:01+HLA-A*02:01~HLA-B*44:02'
+    '|HLA-A*03:01+HLA-B*35:01',
+    # unphased, for comparison
+    'HLA-A*01:01+HLA-B*08:01',
+    'HLA-A*01:01+HLA-A*02:01^HLA-B*08:01+HLA-B*44:02',
+]
+
+
+def flags_check_all(glstr):
+    """
+    returns the set of checks with a violation, from glstring.check
+    """
+    return {name for name, loci, item
+            in check.get_violations(check.check_all(glstr))}
+
+
+def flags_stream(glstr):
+    """
+    returns the set of checks with a violation, from glstring.stream
+    """
+    checked = check_stream(io.StringIO(glstr), chunk_size=7)
+    return {name for name in CHECKS if checked[name]}
+
+
+def flags_encoding(encoded, i):
+    """
+    returns the set of checks with a violation, from glstring.encoding
+    """
+    flags = set()
+    if encoded.duplicate_loci(i):
+        flags.add('locus_blocks')
+    for name in CHECKS[1:]:
+        if encoded.multi_locus(i, name):
+            flags.add(name)
+    return flags
+
+
+class PhasedParityTestSuite(unittest.TestCase):
+    """The phased rule gives the same violations in every checker."""
+
+    def test_stream(self):
+        for glstr in GLSTRINGS:
+            with self.subTest(glstr=glstr):
+                self.assertEqual(flags_stream(glstr), flags_check_all(glstr))
+
+    def test_encoding(self):
+        encoded = EncodedGlStrings().extend(GLSTRINGS)
+        for i, glstr in enumerate(GLSTRINGS):
+            with self.subTest(glstr=glstr):
+                self.assertEqual(flags_encoding(encoded, i),
+                                 flags_check_all(glstr))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_vectorized(self):
+        checked = check_batch(GLSTRINGS)
+        for i, glstr in enumerate(GLSTRINGS):
+            with self.subTest(glstr=glstr):
+                flags = {name for name in CHECKS if checked[name][i]}
+                self.assertEqual(flags, flags_check_all(glstr))
+
+    def test_phased_verdicts(self):
+        self.assertEqual(flags_check_all(GLSTRINGS[0]), set())
+        self.assertEqual(flags_check_all(GLSTRINGS[1]), {'genotypes'})
+        self.assertEqual(flags_check_all(GLSTRINGS[3]), set())
+        self.assertIn('genotype_lists', flags_check_all(GLSTRINGS[4]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from glstring.glstring import reduce_resolution
+from glstring.glstring import reduce_resolutions
+from glstring.glstring import truncate_allele
+
+
+class ResolutionTestSuite(unittest.TestCase):
+    """GL Strings are reduced to fewer fields, collapsing repeats."""
+
+    def test_truncate_allele(self):
+        self.assertEqual(truncate_allele('HLA-A*01:01:01:01', 2),
+                         'HLA-A*01:01')
+        self.assertEqual(truncate_allele('HLA-A*01:01:01:02N', 2),
+                         'HLA-A*01:01N')
+        self.assertEqual(truncate_allele('HLA-A*01:01:01G', 2),
+                         'HLA-A*01:01')
+        self.assertEqual(truncate_allele('HLA-A*01:01', 3), 'HLA-A*01:01')
+        self.assertEqual(truncate_allele('HLA-A', 1), 'HLA-A')
+
+    def test_reduce(self):
+        self.assertEqual(
+            reduce_resolution('HLA-A*01:01:01:01/HLA-A*01:01:02'
+                              '+HLA-A*24:02:01^HLA-B*08:01:01~HLA-C*07:01:01'
+                              '+HLA-B*44:02:01~HLA-C*05:01:01'),
+            'HLA-A*01:01+HLA-A*24:02^HLA-B*08:01~HLA-C*07:01'
+            '+HLA-B*44:02~HLA-C*05:01')
+
+    def test_reduce_one_field(self):
+        self.assertEqual(
+            reduce_resolution('HLA-A*01:01/HLA-A*01:02+HLA-A*24:02', 1),
+            'HLA-A*01+HLA-A*24')
+
+    def test_repeated_genotypes(self):
+        self.assertEqual(
+            reduce_resolution('HLA-A*01:01:01+HLA-A*02:01:01'
+                              '|HLA-A*01:01:02+HLA-A*02:01:02'),
+            'HLA-A*01:01+HLA-A*02:01')
+
+    def test_swapped_sides(self):
+        self.assertEqual(
+            reduce_resolution('HLA-A*01:01:01+HLA-A*02:01:01'
+                              '|HLA-A*02:01:02+HLA-A*01:01:02'),
+            'HLA-A*01:01+HLA-A*02:01')
+
+    def test_distinct_genotypes_kept(self):
+        glstr = 'HLA-A*01:01+HLA-A*02:01|HLA-A*01:01+HLA-A*03:01'
+        self.assertEqual(reduce_resolution(glstr), glstr)
+
+    def test_reduce_resolutions(self):
+        self.assertEqual(
+            list(reduce_resolutions(['HLA-A*01:01:01', 'HLA-B*08:01:01'])),
+            ['HLA-A*01:01', 'HLA-B*08:01'])
+
+
+if __name__ == '__main__':
+    unittest.main()
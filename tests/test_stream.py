@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+
+from glstring import check
+from glstring.stream import check_stream
+from glstring.stream import tokenize
+
+
+GLSTRING = ('HLA-A*01:01/HLA-A*01:02+HLA-A*24:02|HLA-A*01:01+HLA-B*08:01'
+            '^HLA-B*08:01~HLA-C*07:01+HLA-B*44:02~HLA-C*05:01'
+            '^HLA-A*03:01/HLA-C*01:02+HLA-A*03:01')
+
+
+class StreamTestSuite(unittest.TestCase):
+    """GL Strings read in chunks are checked as check_all checks them."""
+
+    def test_events(self):
+        events = list(tokenize(io.StringIO('A*1/A*2+A*3|B*1\n')))
+        self.assertEqual(events, [
+            ('block_start', 0),
+            ('allele', 'A*1'), ('delimiter', '/'),
+            ('allele', 'A*2'), ('delimiter', '+'),
+            ('allele', 'A*3'), ('genotype', 'A*1/A*2+A*3'),
+            ('allele', 'B*1'), ('genotype', 'B*1'),
+            ('block_end', 0),
+        ])
+
+    def test_multibyte_split(self):
+        # one byte chunks end inside the two bytes of the e with accent
+        glstr = 'HLA-A*01:01é+HLA-A*02:01'
+        events = list(tokenize(io.BytesIO(glstr.encode()), chunk_size=1))
+        self.assertIn(('genotype', glstr), events)
+
+    def test_check_all(self):
+        expected = check.check_all(GLSTRING)
+        for chunk_size in (1, 5, 65536):
+            with self.subTest(chunk_size=chunk_size):
+                checked = check_stream(io.BytesIO(GLSTRING.encode()),
+                                       chunk_size)
+                self.assertEqual(checked['locus_blocks'],
+                                 expected['locus_blocks'])
+                for name in ('genotypes', 'allele_lists'):
+                    self.assertEqual(
+                        checked[name],
+                        [item for item in expected[name]
+                         if 'WARNING' in item[2]])
+                    self.assertEqual(checked['counts'][name],
+                                     len(expected[name]))
+                self.assertEqual(
+                    [(loci, msg) for _, loci, msg
+                     in checked['genotype_lists']],
+                    [(loci, msg) for _, loci, msg
+                     in expected['genotype_lists'] if 'WARNING' in msg])
+
+
+if __name__ == '__main__':
+    unittest.main()